@@ -13,8 +13,10 @@ from flask import Flask, request, jsonify
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
+from services.db_service import get_connection
+from services.schema_service import migrate
 from services.user_service import register_user, authenticate_user, get_user_by_email, hash_password
-from services.subscription_service import add_or_update_subscriber, delete_subscriber
+from services.subscription_service import add_or_update_subscriber, delete_subscriber, get_subscriber
 from services.weather_service import geocode_location, get_weather_forecast, generate_weather_summary
 from services.countdown_service import add_countdown, CountdownEvent
 from services.email_service import send_email
@@ -25,8 +27,7 @@ from services.api_service import (
     get_structured_nameday_data
 )
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 import jwt
 
 load_dotenv()
@@ -55,17 +56,17 @@ def send_simple_email(to: str, subject: str, body: str) -> bool:
             print("❌ Email credentials not configured")
             return False
         
-        msg = MIMEMultipart()
+        msg = EmailMessage()
         msg['From'] = email_address
         msg['To'] = to
         msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        msg.set_content(body)
         
         server = smtplib.SMTP(smtp_host, smtp_port)
         if smtp_use_tls:
             server.starttls()
         server.login(email_address, email_password)
-        server.sendmail(email_address, to, msg.as_string())
+        server.send_message(msg)
         server.quit()
         return True
     except Exception as e:
@@ -128,81 +129,20 @@ def init_api_db():
         print(f"⚠️ Database not found at {db_path}")
         print("🔧 Initializing database...")
     
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
     conn.execute("PRAGMA foreign_keys = ON")
     
     try:
-        # Create users table if not exists
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                email TEXT PRIMARY KEY,
-                username TEXT,
-                nickname TEXT,
-                password_hash TEXT,
-                timezone TEXT DEFAULT 'UTC',
-                subscription_type TEXT DEFAULT 'free',
-                weather_enabled INTEGER DEFAULT 0,
-                countdown_enabled INTEGER DEFAULT 0,
-                reminder_enabled INTEGER DEFAULT 0,
-                email_consent INTEGER DEFAULT 0,
-                terms_accepted INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        """)
-        
-        # Create weather_subscriptions table if not exists
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS weather_subscriptions (
-                email TEXT PRIMARY KEY,
-                location TEXT NOT NULL,
-                lat REAL NOT NULL,
-                lon REAL NOT NULL,
-                personality TEXT DEFAULT 'neutral',
-                language TEXT DEFAULT 'en',
-                last_sent_date TEXT,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create countdowns table if not exists
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS countdowns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                name TEXT NOT NULL,
-                date TEXT NOT NULL,
-                yearly INTEGER DEFAULT 0,
-                message_before TEXT,
-                message_after TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create password_reset_tokens table if not exists
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS password_reset_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                token TEXT NOT NULL UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NOT NULL,
-                used INTEGER DEFAULT 0,
-                FOREIGN KEY (email) REFERENCES users(email)
-            )
-        """)
-        
-        # Create indexes
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_reset_token ON password_reset_tokens(token)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_reset_email ON password_reset_tokens(email)")
-        
-        conn.commit()
+        # Same versioned schema as app.init_db, applied in one transaction
+        conn.execute("BEGIN IMMEDIATE")
+        migrate(conn)
+        conn.execute("COMMIT")
         print("✅ Database initialized successfully")
         
     except sqlite3.Error as e:
         print(f"❌ Database initialization error: {e}")
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         raise
     finally:
         conn.close()
@@ -210,7 +150,7 @@ def init_api_db():
 
 def cleanup_expired_tokens():
     """Delete expired and old used password reset tokens."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         # Delete tokens that expired more than 24 hours ago (for audit trail)
         expired_cutoff = datetime.now() - timedelta(hours=24)
@@ -391,7 +331,7 @@ def api_update_password(email):
     email = email.strip().lower()
     hashed_pw = hash_password(new_password)
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         conn.execute("UPDATE users SET password_hash = ? WHERE email = ?", (hashed_pw, email))
         conn.commit()
@@ -420,7 +360,7 @@ def api_update_nickname(email):
     
     email = email.strip().lower()
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         conn.execute("UPDATE users SET nickname = ? WHERE email = ?", (nickname, email))
         conn.commit()
@@ -458,7 +398,7 @@ def api_request_password_reset():
     expires_at = datetime.now() + timedelta(hours=1)  # Token valid for 1 hour
     
     # Store token in database
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         # Delete any existing unused tokens for this email
         conn.execute("DELETE FROM password_reset_tokens WHERE email = ? AND used = 0", (email,))
@@ -522,7 +462,7 @@ def api_reset_password():
         return jsonify({'error': 'Token and new password required'}), 400
     
     # Validate token
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         reset_token = conn.execute("""
@@ -573,7 +513,7 @@ def api_get_weather_subscription(email):
     """Get weather subscription by email."""
     email = email.strip().lower()
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         # First, check what data exists for debugging
@@ -623,15 +563,24 @@ def api_create_weather_subscription():
     if not email or not location:
         return jsonify({'error': 'Email and location required'}), 400
     
-    # Geocode location
-    geocode_result = geocode_location(location)
-    if not geocode_result:
-        return jsonify({'error': 'Invalid location or geocoding failed'}), 400
-    
-    lat, lon, display_name, timezone_str = geocode_result
+    # Reuse stored coordinates when the location is unchanged (e.g. personality/language edits):
+    # the input matches what the user typed last time or the geocoded name we stored for it
+    location_query = location.casefold()
+    current = get_subscriber(email)
+    if (current and current['lat'] is not None and current['lon'] is not None
+            and location_query in (current['location_query'], current['location'].casefold())):
+        lat, lon, display_name, timezone_str = current['lat'], current['lon'], current['location'], current['timezone']
+        location_query = current['location_query'] or location_query
+    else:
+        # Geocode location
+        geocode_result = geocode_location(location)
+        if not geocode_result:
+            return jsonify({'error': 'Invalid location or geocoding failed'}), 400
+        
+        lat, lon, display_name, timezone_str = geocode_result
     
     try:
-        add_or_update_subscriber(email, display_name, lat, lon, personality, language, timezone_str)
+        add_or_update_subscriber(email, display_name, lat, lon, personality, language, timezone_str, location_query=location_query)
         return jsonify({
             'success': True,
             'message': 'Subscription created/updated',
@@ -673,7 +622,7 @@ def api_preview_weather(email):
     """Get weather preview for user."""
     email = email.strip().lower()
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         subscriber = conn.execute("""
@@ -721,7 +670,7 @@ def api_get_countdowns(email):
     """Get all countdowns for a user."""
     email = email.strip().lower()
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         countdowns = conn.execute("""
@@ -782,7 +731,7 @@ def api_update_countdown(countdown_id):
     yearly = data.get('yearly', False)
     message_before = data.get('message_before', '')
     
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         conn.execute("""
             UPDATE countdowns 
@@ -806,7 +755,7 @@ def api_update_countdown(countdown_id):
 @require_api_key
 def api_delete_countdown(countdown_id):
     """Delete a countdown."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     try:
         cursor = conn.execute('DELETE FROM countdowns WHERE id = ?', (countdown_id,))
         conn.commit()
@@ -828,7 +777,7 @@ def api_delete_countdown(countdown_id):
 @require_api_key
 def api_get_stats():
     """Get public statistics."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         total_subscribers = conn.execute("""
@@ -913,7 +862,7 @@ def api_get_countdowns_formatted(current_user_email):
     """Get formatted countdown data with calculations (JWT protected)."""
     try:
         # Get user's timezone
-        conn = sqlite3.connect(get_db_path())
+        conn = get_connection(get_db_path())
         conn.row_factory = sqlite3.Row
         user = conn.execute(
             "SELECT timezone FROM users WHERE email = ?", 
@@ -943,7 +892,7 @@ def api_get_nameday(current_user_email):
     """Get nameday information for user's language (JWT protected)."""
     try:
         # Get user's language preference
-        conn = sqlite3.connect(get_db_path())
+        conn = get_connection(get_db_path())
         conn.row_factory = sqlite3.Row
         weather_sub = conn.execute(
             "SELECT language FROM weather_subscriptions WHERE email = ?",
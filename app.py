@@ -24,24 +24,26 @@ Requirements:
 - Environment variables for email configuration
 """
 
+import atexit
 import os
 import sqlite3
 import sys
-import logging
 import signal
-import argparse
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
-from services.weather_service import list_subscribers
-from services.email_service import start_email_monitor, stop_email_monitor, send_test_email, run_daily_job
-from services.reminder_service import list_reminders, run_due_reminders_job
-from timezonefinder import TimezoneFinder
+import threading
+from dataclasses import dataclass, field
+from functools import cache, partial
+from services.db_service import CONNECTION_PRAGMAS, checkpoint_wal, close_pools
+from services.schema_service import SCHEMA_VERSION, migrate
 
 # Global scheduler variable for signal handling
 scheduler = None
 
-# Initialize timezone finder (reused across all lookups)
-tf = TimezoneFinder()
+# Set when the service should stop; the main thread waits on it while jobs run in the pool
+shutdown_event = threading.Event()
+received_signal = signal.SIGINT
+
+# Seconds to wait for running jobs on shutdown before forcing the process to exit
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "10"))
 
 # Load environment variables from .env file
 try:
@@ -52,59 +54,105 @@ except ImportError:
     pass
 
 # Configure logging with UTF-8 encoding to handle emojis
-from services.logging_service import logger
+from services.logging_service import logger, configure_console
+
+SIGNAL_NAMES = {
+    signal.SIGINT: "SIGINT (Ctrl+C)",
+    signal.SIGTERM: "SIGTERM"
+}
+SHUTDOWN_SIGNALS = set(SIGNAL_NAMES)
 
 def signal_handler(signum, frame):
     """Graceful shutdown handler for Ctrl+C and other signals"""
-    signal_names = {
-        signal.SIGINT: "SIGINT (Ctrl+C)",
-        signal.SIGTERM: "SIGTERM"
-    }
-    signal_name = signal_names.get(signum, f"Signal {signum}")
+    signal_name = SIGNAL_NAMES.get(signum, f"Signal {signum}")
+    
+    if shutdown_event.is_set():
+        logger.warning(f"⚠️ Received {signal_name} again - forcing exit")
+        os._exit(1)
     
+    shutdown_event.set()
+    graceful_shutdown(signum)
+
+def graceful_shutdown(signum):
+    """Stop the monitor and scheduler, letting running jobs finish, then exit."""
+    signal_name = SIGNAL_NAMES.get(signum, f"Signal {signum}")
     logger.info(f"🛑 Received {signal_name} - Shutting down Daily Brief Service gracefully...")
     
+    # Watchdog: let running jobs finish, but never let a stuck socket hang shutdown
+    watchdog = threading.Timer(SHUTDOWN_TIMEOUT, os._exit, args=(1,))
+    watchdog.daemon = True
+    watchdog.start()
+    
+    from services.email_service import stop_email_monitor  # already loaded by main()
     stop_email_monitor()
     
     if scheduler and scheduler.running:
-        logger.info("⏰ Stopping scheduled jobs...")
-        scheduler.shutdown(wait=False)
+        logger.info(f"⏰ Waiting up to {SHUTDOWN_TIMEOUT:.0f}s for running jobs to finish...")
+        scheduler.shutdown(wait=True)
         logger.info("✅ Daily Brief Service stopped successfully")
     else:
         logger.info("⚠️ Scheduler not running")
     
+    watchdog.cancel()
     print("\n👋 Daily Brief Service has been stopped. Goodbye!")
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
-signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
+def _wait_for_signals():
+    """Receive shutdown signals synchronously so they never interrupt a job or SQLite call mid-flight."""
+    global received_signal
+    while True:
+        signum = signal.sigwait(SHUTDOWN_SIGNALS)
+        if shutdown_event.is_set():
+            logger.warning(f"⚠️ Received {SIGNAL_NAMES[signum]} again - forcing exit")
+            os._exit(1)
+        received_signal = signum
+        shutdown_event.set()
+
+def install_signal_handling():
+    """Route SIGINT/SIGTERM to one sigwait thread (POSIX) or to signal_handler elsewhere."""
+    if hasattr(signal, "pthread_sigmask"):
+        # Blocked before any worker thread starts, so every thread inherits the mask
+        signal.pthread_sigmask(signal.SIG_BLOCK, SHUTDOWN_SIGNALS)
+        threading.Thread(target=_wait_for_signals, name="signal-wait", daemon=True).start()
+    else:
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, signal_handler)
+
+def _shutdown_scheduler_at_exit():
+    """Safety net for exits that bypass signal_handler."""
+    if scheduler and scheduler.running:
+        scheduler.shutdown(wait=False)
+    close_pools()
+
+atexit.register(_shutdown_scheduler_at_exit)
+
+
+def _required_env(key: str) -> str:
+    """Get required environment variable or exit."""
+    value = os.getenv(key)
+    if not value:
+        logger.error(f"Required environment variable {key} is not set")
+        sys.exit(1)
+    return value
 
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Configuration from environment variables."""
-    def __init__(self):
-        self.email_address = self._get_env("EMAIL_ADDRESS")
-        self.email_password = self._get_env("EMAIL_PASSWORD")
-        self.imap_host = self._get_env("IMAP_HOST")
-        self.imap_port = int(os.getenv("IMAP_PORT", "993"))
-        self.smtp_host = self._get_env("SMTP_HOST")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
-        self.timezone = os.getenv("TZ", "Europe/Bratislava")
-        self.language = os.getenv("LANGUAGE", "en")  # Default to English
-        
-    def _get_env(self, key: str) -> str:
-        """Get required environment variable or exit."""
-        value = os.getenv(key)
-        if not value:
-            logger.error(f"Required environment variable {key} is not set")
-            sys.exit(1)
-        return value
+    """Configuration from environment variables, parsed once when the instance is built."""
+    email_address: str = field(default_factory=lambda: _required_env("EMAIL_ADDRESS"))
+    email_password: str = field(default_factory=lambda: _required_env("EMAIL_PASSWORD"), repr=False)
+    imap_host: str = field(default_factory=lambda: _required_env("IMAP_HOST"))
+    imap_port: int = field(default_factory=lambda: int(os.getenv("IMAP_PORT", "993")))
+    smtp_host: str = field(default_factory=lambda: _required_env("SMTP_HOST"))
+    smtp_port: int = field(default_factory=lambda: int(os.getenv("SMTP_PORT", "587")))
+    smtp_use_tls: bool = field(default_factory=lambda: os.getenv("SMTP_USE_TLS", "true").lower() == "true")
+    timezone: str = field(default_factory=lambda: os.getenv("TZ", "Europe/Bratislava"))
+    language: str = field(default_factory=lambda: os.getenv("LANGUAGE", "en"))  # Default to English
 
 
+@cache
 def load_env() -> Config:
-    """Load and validate environment configuration."""
+    """Load and validate environment configuration (once per process; later calls return the same Config)."""
     logger.info("Loading configuration from environment variables")
     # Check which .env file is being used
     env_path = os.path.abspath('.env')
@@ -131,188 +179,141 @@ def init_db(path: str = None) -> None:
     if path is None:
         path = os.getenv("APP_DB_PATH", "app.db")
     logger.info(f"Initializing database at {path}")
-    conn = sqlite3.connect(path)
+    # isolation_level=None: no implicit BEGINs, the schema setup below is one explicit transaction
+    conn = sqlite3.connect(path, isolation_level=None)
     conn.execute("PRAGMA foreign_keys = ON")
     
     try:
-        # Master users table - central user registry
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                email TEXT PRIMARY KEY,
-                username TEXT,
-                nickname TEXT,
-                password_hash TEXT,
-                timezone TEXT DEFAULT 'UTC',
-                lat REAL,
-                lon REAL,
-                subscription_type TEXT DEFAULT 'free',
-                weather_enabled INTEGER DEFAULT 0,
-                countdown_enabled INTEGER DEFAULT 0,
-                reminder_enabled INTEGER DEFAULT 0,
-                email_consent INTEGER DEFAULT 0,
-                terms_accepted INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        """)
-        logger.info("Ensured master users table exists.")
-        
-        # Add nickname column if it doesn't exist (for migration)
-        try:
-            conn.execute("ALTER TABLE users ADD COLUMN nickname TEXT")
-            logger.info("Added nickname column to users table")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Add consent columns if they don't exist
-        try:
-            conn.execute("ALTER TABLE users ADD COLUMN email_consent INTEGER DEFAULT 0")
-            logger.info("Added email_consent column to users table")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("ALTER TABLE users ADD COLUMN terms_accepted INTEGER DEFAULT 0")
-            logger.info("Added terms_accepted column to users table")
-        except sqlite3.OperationalError:
-            pass
-        
-        # Weather subscriptions module table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS weather_subscriptions (
-                email TEXT PRIMARY KEY,
-                location TEXT NOT NULL,
-                personality TEXT DEFAULT 'neutral',
-                language TEXT DEFAULT 'en',
-                last_sent_date TEXT,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
-            )
-        """)
-        logger.info("Ensured weather_subscriptions table exists.")
-        
-        # Countdowns module table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS countdowns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                name TEXT NOT NULL,
-                date TEXT NOT NULL,
-                yearly INTEGER DEFAULT 0,
-                message_before TEXT,
-                message_after TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
-            )
-        """)
-        logger.info("Ensured countdowns table exists.")
+        # WAL is stored in the database file: readers no longer block the writer and
+        # commits skip the rollback-journal fsync. The schema setup below uses the same
+        # per-connection tuning as the pooled connections. (journal_mode can't change inside a transaction.)
+        conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
         
-        # Add created_at column to countdowns if it doesn't exist (migration)
-        try:
-            conn.execute("ALTER TABLE countdowns ADD COLUMN created_at TEXT")
-            logger.info("Added created_at column to countdowns table")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Reminders table for calendar service
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                message TEXT NOT NULL,
-                first_run_at TEXT NOT NULL,
-                remaining_repeats INTEGER NOT NULL,
-                last_sent_at TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
-            )
-        """)
-        logger.info("Ensured reminders table exists.")
+        # Take the write lock up front and apply all DDL with a single commit
+        conn.execute("BEGIN IMMEDIATE")
         
-        # Inbox log for deduplication
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS inbox_log (
-                uid TEXT PRIMARY KEY,
-                from_email TEXT NOT NULL,
-                received_at TEXT NOT NULL,
-                subject TEXT,
-                body_hash TEXT
-            )
-        """)
-        logger.info("Ensured inbox_log table exists.")
+        applied = migrate(conn)
+        logger.info(f"Database schema at version {SCHEMA_VERSION} ({applied} migrations applied).")
         
-        # Password reset tokens table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS password_reset_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL,
-                token TEXT UNIQUE NOT NULL,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                expires_at TEXT NOT NULL,
-                used INTEGER DEFAULT 0,
-                used_at TEXT
-            )
-        """)
-        logger.info("Ensured password_reset_tokens table exists.")
+        conn.execute("COMMIT")
         
-        # Create indexes for performance
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_weather 
-            ON users(weather_enabled) WHERE weather_enabled = 1
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_countdown 
-            ON users(countdown_enabled) WHERE countdown_enabled = 1
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_reminder 
-            ON users(reminder_enabled) WHERE reminder_enabled = 1
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_countdowns_email 
-            ON countdowns(email)
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_reminders_email_time 
-            ON reminders(email, first_run_at)
-        """)
-        logger.info("Ensured all indexes exist.")
+        # Refresh planner statistics where they are missing or stale (no-op otherwise)
+        conn.execute("PRAGMA optimize")
         
-        conn.commit()
+        # Start the service with an empty WAL instead of one holding the startup DDL
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
     except sqlite3.Error as e:
         logger.error(f"Database initialization error: {e}")
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         raise
     finally:
         conn.close()
 
 
+# Scheduler job ids of the per-timezone daily jobs: DAILY_JOB_PREFIX + timezone name
+DAILY_JOB_PREFIX = "daily_brief:"
+
+# Timezones CronTrigger refused; remembered so the hourly reschedule logs each one only once
+_rejected_timezones = set()
+
+
+def schedule_daily_jobs(scheduler, config, db_path) -> None:
+    """Keep one CronTrigger(hour=5) job per timezone with active users, so the scheduler only
+    wakes when some subscriber's local day starts instead of scanning every user each tick."""
+    from apscheduler.triggers.cron import CronTrigger
+    from services.email_service import list_active_timezones, run_daily_job
+
+    wanted = set(list_active_timezones(db_path))
+    for job in scheduler.get_jobs():
+        if job.id.startswith(DAILY_JOB_PREFIX) and job.id[len(DAILY_JOB_PREFIX):] not in wanted:
+            job.remove()
+    for tz in wanted:
+        job_id = DAILY_JOB_PREFIX + tz
+        if tz in _rejected_timezones or scheduler.get_job(job_id):
+            continue
+        try:
+            trigger = CronTrigger(hour=5, minute=0, timezone=tz)
+        except Exception as e:
+            _rejected_timezones.add(tz)
+            logger.error(f"Skipping daily job for timezone {tz!r}, its users rely on the hourly safety net: {e}")
+            continue
+        scheduler.add_job(
+            partial(run_daily_job, config, db_path=db_path, timezone_name=tz),
+            trigger,
+            id=job_id,
+            replace_existing=True
+        )
+        logger.info(f"📅 Daily brief job scheduled for 5:00 AM {tz}")
+
+
+def run_daily_safety_net(scheduler, config, db_path) -> None:
+    """Hourly: pick up new subscriber timezones, then send to anyone a per-timezone job missed."""
+    from services.email_service import run_daily_job
+
+    schedule_daily_jobs(scheduler, config, db_path)
+    run_daily_job(config, db_path=db_path)
+
+
 def main():
+    configure_console()
+    install_signal_handling()
     logger.info("Starting Daily Brief Service...")
     config = load_env()
     db_path = os.getenv("APP_DB_PATH", "app.db")
     init_db(db_path)
 
+    # Imported here so tools that only need Config/init_db don't pay for the scheduler,
+    # or for the weather/email services (requests, message catalogues)
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+    from services.email_service import start_email_monitor
+
     global scheduler
-    scheduler = BlockingScheduler()
+    scheduler = BackgroundScheduler(
+        executors={'default': ThreadPoolExecutor(16)},
+        job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 900}
+    )
 
-    # Schedule daily weather job to run at 5 AM daily (change to */5 for testing)
+    # One 5 AM job per subscriber timezone, plus an hourly safety net that schedules timezones
+    # of new subscribers and sends to anyone still due. Daily runs never overlap (run_daily_job
+    # holds a lock until its sends are stamped), so last_sent_date prevents double sends
+    schedule_daily_jobs(scheduler, config, db_path)
     scheduler.add_job(
-        lambda: run_daily_job(config),
-        #CronTrigger(hour=5, minute=0, timezone=config.timezone),
-        CronTrigger(minute='*/5', timezone=config.timezone),  # For testing: every 5 minutes
+        partial(run_daily_safety_net, scheduler, config, db_path),
+        # jitter spreads deployments' ticks off the same second
+        CronTrigger(minute=30, jitter=30),
+        id='daily_weather',
         replace_existing=True
     )
     
-    logger.info(f"📅 Scheduler configured: Daily emails at 5:00 AM {config.timezone}")
+    # Bound the -wal file between restarts
+    scheduler.add_job(
+        partial(checkpoint_wal, db_path),
+        IntervalTrigger(weeks=1),
+        id='wal_checkpoint',
+        replace_existing=True
+    )
+    
+    logger.info("📅 Scheduler configured: Daily emails at 5:00 AM in each subscriber's timezone")
 
     # Start email monitor in a separate thread
     start_email_monitor()
 
+    scheduler.start()
     logger.info("✅ Daily Brief Service is running. Press Ctrl+C to stop.")
     try:
-        scheduler.start()
-    except (KeyboardInterrupt, SystemExit):
+        # Short waits keep the main thread responsive to Ctrl+C on every platform
+        while not shutdown_event.wait(timeout=1):
+            pass
+    except KeyboardInterrupt:
         signal_handler(signal.SIGINT, None)
+    # Signal received by the sigwait thread; shut down here, on the main thread
+    graceful_shutdown(received_signal)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
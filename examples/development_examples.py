@@ -19,7 +19,6 @@ try:
         parse_plaintext,
         generate_weather_summary,
         detect_weather_condition,
-        load_weather_messages,
         init_db
     )
 except ImportError as e:
@@ -164,7 +163,13 @@ def verify_weather_messages():
     print("=" * 50)
     
     try:
-        messages = load_weather_messages()
+        path = os.path.join(os.path.dirname(__file__), '..', 'languages', 'en', 'weather_messages.txt')
+        messages = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split('|')
+                if len(parts) >= 2 and not parts[0].startswith('#'):
+                    messages[parts[0]] = dict(zip(['neutral', 'cute', 'brutal', 'emuska'], parts[1:]))
         print(f"✅ Loaded {len(messages)} weather conditions")
         
         # Check for required personality modes
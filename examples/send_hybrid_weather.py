@@ -9,7 +9,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))  # Go up one level
 
-from app import Config, load_env, get_weather_forecast, send_email, load_weather_messages
+from app import Config, load_env, get_weather_forecast, send_email
 from localization import get_localized_subject
 import sqlite3
 
@@ -51,6 +51,23 @@ def determine_weather_condition(weather_data):
     else:
         return 'cloudy'
 
+def load_weather_messages(language):
+    """Read languages/<language>/weather_messages.txt into {condition: {personality: message}}."""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'languages', language, 'weather_messages.txt')
+    messages = {}
+    if not os.path.exists(path):
+        return messages
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('|')
+            if len(parts) < 2:
+                continue
+            messages[parts[0]] = dict(zip(['neutral', 'cute', 'brutal', 'emuska'], parts[1:]))
+    return messages
+
 def get_weather_condition_message(condition, personality, language):
     """Get weather condition message from weather_messages.txt files."""
     
@@ -54,6 +54,7 @@ def validate_schema():
                 'personality',
                 'language',
                 'last_sent_date',
+                'location_query',
                 'updated_at'
             ],
             'countdowns': [
@@ -8,11 +8,10 @@ import sqlite3
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from typing import Dict, List, Optional, Any
-import requests
-
-from services.weather_service import get_weather_forecast, generate_weather_summary
+from services.weather_service import get_weather_forecast, generate_weather_summary, detect_weather_condition, http_session, parse_json_response
 from services.countdown_service import get_user_countdowns, CountdownEvent
 from services.namedays_service import get_nameday_message
+from services.db_service import get_connection
 
 
 def get_week_weather_forecast(lat: float, lon: float, timezone: str) -> Optional[List[Dict[str, Any]]]:
@@ -30,9 +29,9 @@ def get_week_weather_forecast(lat: float, lon: float, timezone: str) -> Optional
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_session.get(url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = parse_json_response(response)
         daily = data.get("daily", {})
         
         dates = daily.get("time", [])
@@ -82,62 +81,7 @@ def get_week_weather_forecast(lat: float, lon: float, timezone: str) -> Optional
 def _determine_weather_condition(temp_max: float, temp_min: float, precipitation: float, 
                                   wind_speed: float, rain_prob: int) -> str:
     """Determine weather condition code based on weather parameters."""
-    # Combined conditions
-    if temp_max >= 30 and rain_prob < 20:
-        return 'sunny_hot'
-    if temp_max <= 5 and wind_speed >= 15:
-        return 'cold_windy'
-    if temp_max <= 5 and precipitation >= 2:
-        return 'rainy_cold'
-    # Extreme conditions
-    if temp_max >= 36:
-        return 'heatwave'
-    if temp_min <= -15:
-        return 'blizzard'
-    # Thunderstorm
-    if precipitation >= 10 and rain_prob >= 70:
-        return 'thunderstorm'
-    # Heavy rain
-    if precipitation >= 7:
-        return 'heavy_rain'
-    # Raining
-    if precipitation >= 2:
-        return 'raining'
-    # Snowing
-    if temp_max <= 2 and precipitation > 0.5:
-        return 'snowing'
-    # Freezing
-    if temp_min < 0 and precipitation <= 0.1:
-        return 'freezing'
-    # Hot
-    if temp_max >= 30:
-        return 'hot'
-    # Cold
-    if temp_max <= 5:
-        return 'cold'
-    # Windy
-    if wind_speed >= 15:
-        return 'windy'
-    # Foggy
-    if temp_min >= -2 and temp_max <= 8 and precipitation < 0.2 and wind_speed < 8 and rain_prob >= 60:
-        return 'foggy'
-    # Humid
-    if rain_prob >= 70 and precipitation < 0.2:
-        return 'humid'
-    # Dry
-    if precipitation < 0.05 and temp_max >= 25:
-        return 'dry'
-    # Sunny
-    if temp_max >= 20 and rain_prob < 20 and precipitation < 0.1:
-        return 'sunny'
-    # Mild
-    if temp_max >= 10 and rain_prob < 40 and precipitation < 0.2:
-        return 'mild'
-    # Cloudy
-    if rain_prob >= 30 or precipitation > 0.05:
-        return 'cloudy'
-    # Fallback
-    return 'default'
+    return detect_weather_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob)
 
 
 def get_structured_weather_data(email: str, db_path: str = None) -> Optional[Dict[str, Any]]:
@@ -150,7 +94,7 @@ def get_structured_weather_data(email: str, db_path: str = None) -> Optional[Dic
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
     
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path, readonly=True)
     conn.row_factory = sqlite3.Row
     
     try:
@@ -305,7 +249,7 @@ def get_daily_brief_data(email: str, db_path: str = None) -> Dict[str, Any]:
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
     
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path, readonly=True)
     conn.row_factory = sqlite3.Row
     
     try:
@@ -1,8 +1,10 @@
+import json
 import os
 import sqlite3
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from typing import List, Optional
+from services.db_service import get_connection
 
 class CountdownEvent:
     def __init__(self, name: str, date: str, yearly: bool, email: str, message_before: Optional[str] = None, message_after: Optional[str] = None):
@@ -56,7 +58,7 @@ def add_countdown(event: CountdownEvent, path: str = None):
     except ValueError:
         raise ValueError(f"Invalid date format: {event.date}. Expected YYYY-MM-DD.")
     
-    conn = sqlite3.connect(path)
+    conn = get_connection(path)
     conn.row_factory = sqlite3.Row
     try:
         # Check for duplicate
@@ -100,7 +102,7 @@ def add_countdown(event: CountdownEvent, path: str = None):
 def get_user_countdowns(email: str, path: str = None) -> List[CountdownEvent]:
     if path is None:
         path = os.getenv("APP_DB_PATH", "app.db")
-    conn = sqlite3.connect(path)
+    conn = get_connection(path, readonly=True)
     try:
         rows = conn.execute("SELECT name, date, yearly, message_before, message_after FROM countdowns WHERE email = ?", (email,)).fetchall()
         events = [CountdownEvent(name, date, bool(yearly), email, message_before, message_after) for name, date, yearly, message_before, message_after in rows]
@@ -108,9 +110,32 @@ def get_user_countdowns(email: str, path: str = None) -> List[CountdownEvent]:
     finally:
         conn.close()
 
+# Constant text so the pooled connections' statement cache reuses one prepared statement
+# whatever the number of users; the emails are bound as a single JSON array
+SQL_SELECT_COUNTDOWNS_FOR_USERS = """
+    SELECT email, name, date, yearly, message_before, message_after FROM countdowns
+    WHERE email IN (SELECT value FROM json_each(?))
+"""
+
+def get_countdowns_for_users(emails, path: str = None) -> dict:
+    """Load the countdowns of many users with one query instead of one query per user."""
+    if path is None:
+        path = os.getenv("APP_DB_PATH", "app.db")
+    countdowns = {email: [] for email in emails}
+    if not countdowns:
+        return countdowns
+    conn = get_connection(path, readonly=True)
+    try:
+        rows = conn.execute(SQL_SELECT_COUNTDOWNS_FOR_USERS, (json.dumps(list(countdowns)),))
+        for email, name, date, yearly, message_before, message_after in rows:
+            countdowns[email].append(CountdownEvent(name, date, bool(yearly), email, message_before, message_after))
+        return countdowns
+    finally:
+        conn.close()
+
 def delete_countdown(email: str, name: str, path: str = "app.db"):
     """Delete a countdown and disable module if user has no more countdowns."""
-    conn = sqlite3.connect(path)
+    conn = get_connection(path)
     try:
         conn.execute("DELETE FROM countdowns WHERE email = ? AND name = ?", (email, name))
         
@@ -130,11 +155,13 @@ def delete_countdown(email: str, name: str, path: str = "app.db"):
     finally:
         conn.close()
 
-def generate_countdown_summary(email: str, today: datetime, tz: str = "Europe/Bratislava", path: str = "app.db") -> str:
-    events = get_user_countdowns(email, path)
+def generate_countdown_summary(email: str, today: datetime, tz: str = "Europe/Bratislava", path: str = "app.db", events: Optional[List[CountdownEvent]] = None) -> str:
+    """Format a user's countdowns; pass `events` when they were already loaded in bulk."""
+    if events is None:
+        events = get_user_countdowns(email, path)
     if not events:
         return ""
-    summary = ""
+    lines = []
     # Ensure 'today' is timezone-aware
     if today.tzinfo is None:
         now = today.replace(tzinfo=ZoneInfo(tz))
@@ -169,7 +196,7 @@ def generate_countdown_summary(email: str, today: datetime, tz: str = "Europe/Br
         if msg:
             # If {days_number} is not already replaced in msg, append days
             if "{days_number}" not in event.message_before and "{days_number}" not in event.message_after:
-                summary += f"{msg}: {days_number} {days_word}\n"
+                lines.append(f"{msg}: {days_number} {days_word}")
             else:
-                summary += f"{msg}\n"
-    return summary.strip()
+                lines.append(msg)
+    return "\n".join(lines).strip()
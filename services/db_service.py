@@ -0,0 +1,132 @@
+"""
+Database Service Module
+Process-wide SQLite connection pool shared by the services, API and scheduled jobs.
+"""
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+
+# Idle connections kept open per database file
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+# Compiled statements kept per connection; pooled connections live long enough to reuse them.
+# Hot queries are module-level constant strings so every trigger hits this cache.
+DB_CACHED_STATEMENTS = 512
+
+# Applied to every new pooled connection; journal_mode=WAL itself is set once by init_db
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA busy_timeout = 30000",
+    # Per-connection setting: checkpoint every ~40 MB of WAL rather than every ~4 MB so the
+    # daily job's write burst isn't interrupted by checkpoints; checkpoint_wal() trims the file
+    "PRAGMA wal_autocheckpoint = 10000",
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_db_path():
+    return os.getenv("APP_DB_PATH", "app.db")
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool instead of closing the file."""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+
+class ConnectionPool:
+    """Keeps up to `size` idle connections to one database file for reuse across calls and threads.
+
+    Read-only pools open the file with mode=ro, so read paths can never take the write lock.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            if self.readonly:
+                target, uri, isolation_level = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro", True, "DEFERRED"
+            else:
+                # Writers open their implicit transactions with BEGIN IMMEDIATE: the write lock is taken
+                # up front (waiting out busy_timeout) instead of failing with SQLITE_BUSY on lock upgrade
+                target, uri, isolation_level = self.path, False, "IMMEDIATE"
+            conn = sqlite3.connect(target, factory=PooledConnection, check_same_thread=False,
+                                   cached_statements=DB_CACHED_STATEMENTS, uri=uri, isolation_level=isolation_level)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            conn.pool = self
+            return conn
+
+    def release(self, conn):
+        # Leave no open transaction or per-call settings behind for the next user
+        if _pools.get((self.path, self.readonly)) is not self:
+            conn.close_for_real()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close_for_real()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close_for_real()
+            except queue.Empty:
+                return
+
+
+def get_connection(db_path=None, readonly=False):
+    """Get a pooled connection to db_path (APP_DB_PATH by default); conn.close() returns it to the pool.
+
+    Pass readonly=True from paths that only SELECT; they get their own pool of mode=ro connections.
+    """
+    if db_path is None:
+        db_path = get_db_path()
+    key = (os.fspath(db_path), readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(key[0], readonly=readonly))
+    return pool.acquire()
+
+
+def checkpoint_wal(db_path=None):
+    """Copy the WAL back into the database and truncate it; returns (busy, wal_pages, checkpointed_pages)."""
+    conn = get_connection(db_path)
+    try:
+        return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+
+
+def close_pools():
+    """Close every idle pooled connection (shutdown, tests removing database files)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
@@ -1,16 +1,18 @@
 # --- Daily Job Handler ---
 import os
 import sqlite3
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from services.weather_service import generate_weather_summary, get_weather_forecast
-from services.countdown_service import generate_countdown_summary, get_user_countdowns
+from services.countdown_service import generate_countdown_summary, get_user_countdowns, get_countdowns_for_users
 from services.namedays_service import get_nameday_message
 from services.logging_service import logger
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 import reprlib
+from services.db_service import get_connection
 
 # Stubs for app.py imports
 def start_email_monitor():
@@ -25,22 +27,67 @@ def send_test_email(config, to):
 # Dummy send_email for demonstration
 # Replace with actual implementation
 
+def build_email_message(config, to, subject, body):
+    """Plain single-part message - no multipart wrapper needed without attachments."""
+    msg = EmailMessage()
+    msg['From'] = config.email_address
+    msg['To'] = to
+    msg['Subject'] = subject
+    msg.set_content(body)
+    return msg
+
+def open_smtp(config):
+    """Connect, upgrade to TLS if configured, and log in."""
+    print(f"[DEBUG] Connecting to SMTP server: {config.smtp_host}:{config.smtp_port}")
+    server = smtplib.SMTP(config.smtp_host, config.smtp_port)
+    if config.smtp_use_tls:
+        server.starttls()
+    server.login(config.email_address, config.email_password)
+    return server
+
+class SMTPBatch:
+    """One SMTP session reused for a batch of sends.
+
+    Connects on the first send (so runs with nobody to email never touch the server)
+    and reconnects once if the server drops the session mid-batch.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.server = None
+
+    def send(self, to, subject, body):
+        print(f"[EMAIL ATTEMPT] To: {to} | Subject: {subject}")
+        msg = build_email_message(self.config, to, subject, body)
+        try:
+            try:
+                if self.server is None:
+                    self.server = open_smtp(self.config)
+                self.server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                self.close()
+                self.server = open_smtp(self.config)
+                self.server.send_message(msg)
+            print(f"[EMAIL SUCCESS] To: {to} | Subject: {subject}")
+            return True
+        except Exception as e:
+            print(f"[EMAIL FAILURE] To: {to} | Subject: {subject} | Error: {e}")
+            return False
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
 def send_email(config, to, subject, body):
     print(f"[EMAIL ATTEMPT] To: {to} | Subject: {subject}")
     print(f"[DEBUG] Using EMAIL_PASSWORD: {reprlib.repr(config.email_password)} (length: {len(config.email_password)})")
     try:
-        msg = MIMEMultipart()
-        msg['From'] = config.email_address
-        msg['To'] = to
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-
-        print(f"[DEBUG] Connecting to SMTP server: {config.smtp_host}:{config.smtp_port}")
-        server = smtplib.SMTP(config.smtp_host, config.smtp_port)
-        if config.smtp_use_tls:
-            server.starttls()
-        server.login(config.email_address, config.email_password)
-        server.sendmail(config.email_address, to, msg.as_string())
+        msg = build_email_message(config, to, subject, body)
+        server = open_smtp(config)
+        server.send_message(msg)
         server.quit()
         print(f"[EMAIL SUCCESS] To: {to} | Subject: {subject}")
         return True
@@ -49,7 +96,8 @@ def send_email(config, to, subject, body):
         return False
 
 # Example user dict: {'email': ..., 'weather_enabled': True, 'countdown_enabled': True, ...}
-def send_daily_email(config, user):
+def send_daily_email(config, user, smtp=None):
+    """Send one daily brief; pass an SMTPBatch as smtp to reuse its connection."""
     email = user['email']
     subject = "Your Daily Brief"
     
@@ -74,15 +122,108 @@ def send_daily_email(config, user):
         if not body.strip():
             body = "No active subscriptions."
     
-    result = send_email(config, email, subject, body)
+    if smtp is not None:
+        result = smtp.send(email, subject, body)
+    else:
+        result = send_email(config, email, subject, body)
     if result:
         print(f"✅ Sent daily email to {email}")
     else:
         print(f"❌ Failed to send daily email to {email}")
     return result
 
-        
-def run_daily_job(config, dry_run=False, db_path=None, force_send=False):
+
+# Users with any enabled module, joined with their weather subscription (if any)
+SQL_SELECT_ACTIVE_USERS = """
+    SELECT 
+        u.email, 
+        ws.lat, 
+        ws.lon, 
+        u.timezone,
+        u.weather_enabled, 
+        u.countdown_enabled, 
+        u.reminder_enabled,
+        ws.location,
+        ws.personality,
+        ws.language,
+        u.last_sent_date
+    FROM users u
+    LEFT JOIN weather_subscriptions ws ON u.email = ws.email
+    WHERE (u.weather_enabled = 1 OR u.countdown_enabled = 1 OR u.reminder_enabled = 1)
+"""
+
+# Same selection limited to one timezone, for the per-timezone 5 AM jobs
+SQL_SELECT_ACTIVE_USERS_IN_TZ = SQL_SELECT_ACTIVE_USERS + "    AND COALESCE(u.timezone, 'UTC') = ?\n"
+
+SQL_SELECT_ACTIVE_TIMEZONES = """
+    SELECT DISTINCT COALESCE(timezone, 'UTC') FROM users
+    WHERE (weather_enabled = 1 OR countdown_enabled = 1 OR reminder_enabled = 1)
+"""
+
+def list_active_timezones(db_path=None):
+    """Distinct timezones of users with any enabled module; one daily job is scheduled per entry."""
+    if db_path is None:
+        db_path = os.getenv("APP_DB_PATH", "app.db")
+    conn = get_connection(db_path, readonly=True)
+    try:
+        return [row[0] for row in conn.execute(SQL_SELECT_ACTIVE_TIMEZONES)]
+    finally:
+        conn.close()
+
+# Recorded per successful send (user's local date) so later ticks in the 5 AM hour skip the user
+SQL_MARK_SENT = "UPDATE users SET last_sent_date = ? WHERE email = ?"
+
+# Concurrent Open-Meteo requests when prefetching forecasts for a daily run
+FORECAST_FETCH_WORKERS = 16
+
+def forecast_key(lat, lon, tz):
+    """Bucket subscribers to ~1 km (2 decimal places) so nearby users share one forecast request."""
+    return round(lat, 2), round(lon, 2), tz
+
+def fetch_forecasts(locations):
+    """Fetch forecasts for a set of (lat, lon, timezone) keys concurrently; failed lookups map to None."""
+    if not locations:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(FORECAST_FETCH_WORKERS, len(locations))) as executor:
+        futures = {executor.submit(get_weather_forecast, *key): key for key in locations}
+        forecasts = {}
+        for future in as_completed(futures):
+            try:
+                forecasts[futures[future]] = future.result()
+            except Exception as e:
+                logger.error(f"Weather fetch failed for {futures[future]}: {e}")
+                forecasts[futures[future]] = None
+        return forecasts
+
+# Static sign-off appended to every daily brief
+DAILY_EMAIL_FOOTER = "\n\n---\nHave a great day!\nYour DailyWeather team"
+
+# Failures only abort the daily job once this many sends were attempted
+MIN_BATCH_FOR_ABORT = 10
+
+# Sent stamps are written in batches of this size; a crash can resend at most this many briefs
+MARK_SENT_BATCH = 50
+
+def mark_sent(marks, db_path=None):
+    """Stamp last_sent_date for a list of (date, email) pairs in one transaction, then empty the list."""
+    if not marks:
+        return
+    conn = get_connection(db_path)
+    try:
+        with conn:
+            updated = conn.executemany(SQL_MARK_SENT, marks).rowcount
+    finally:
+        conn.close()
+    if updated < len(marks):
+        # An unstamped user is mailed again by the next safety-net run
+        logger.warning(f"Marked {updated} of {len(marks)} sent briefs; batch: {[email for _, email in marks]}")
+    marks.clear()
+
+# Held for a whole daily run: the per-timezone jobs and the hourly safety net have different
+# scheduler ids, and one must not pick users another has mailed but not yet stamped
+_daily_job_lock = threading.Lock()
+
+def run_daily_job(config, dry_run=False, db_path=None, force_send=False, timezone_name=None):
     """Send daily emails to all subscribers using unified database schema.
     
     Args:
@@ -90,79 +231,97 @@ def run_daily_job(config, dry_run=False, db_path=None, force_send=False):
         dry_run: If True, don't actually send emails
         db_path: Path to database
         force_send: If True, bypass time check and send immediately (for testing)
+        timezone_name: If set, only consider users in this timezone (per-timezone 5 AM jobs)
     """
+    with _daily_job_lock:
+        _run_daily_job(config, dry_run, db_path, force_send, timezone_name)
+
+def _run_daily_job(config, dry_run, db_path, force_send, timezone_name):
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
     logger.info("Running daily job - checking users for delivery" + (" [FORCE SEND MODE]" if force_send else ""))
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path, readonly=True)
     conn.row_factory = sqlite3.Row
+    smtp = SMTPBatch(config)  # one SMTP session for every brief sent in this run
+    sent_marks = []  # (date, email) of successful sends not yet stamped
     try:
-        # Select all users with any enabled module, joining with weather subscriptions
-        users = conn.execute("""
-            SELECT 
-                u.email, 
-                ws.lat, 
-                ws.lon, 
-                u.timezone,
-                u.weather_enabled, 
-                u.countdown_enabled, 
-                u.reminder_enabled,
-                ws.location,
-                ws.personality,
-                ws.language
-            FROM users u
-            LEFT JOIN weather_subscriptions ws ON u.email = ws.email
-            WHERE (u.weather_enabled = 1 OR u.countdown_enabled = 1 OR u.reminder_enabled = 1)
-        """).fetchall()
+        # Select all users with any enabled module, joining with weather subscriptions.
+        # Stream the cursor and keep only users whose local delivery hour is now.
+        if timezone_name is None:
+            users = conn.execute(SQL_SELECT_ACTIVE_USERS)
+        else:
+            users = conn.execute(SQL_SELECT_ACTIVE_USERS_IN_TZ, (timezone_name,))
         
-        logger.info(f"Checking {len(users)} users for delivery")
+        checked_count = 0
         sent_count = 0
+        failed_count = 0
+        # Read the clock once per run; each user's local time is a conversion of this instant
+        run_now = datetime.now(timezone.utc)
+        due_users = []
         
         for user in users:
-            email_addr = user['email']
+            checked_count += 1
             user_tz = user['timezone'] or 'UTC'
+            try:
+                user_now = run_now.astimezone(ZoneInfo(user_tz))
+            except Exception as e:
+                logger.error(f"Error processing user {user['email']}: {e}")
+                continue
+            # Only send if it's 5AM in user's local time and today's brief hasn't gone out (unless force_send is True)
+            if force_send or (user_now.hour == 5 and user['last_sent_date'] != user_now.date().isoformat()):
+                due_users.append((user, user_tz, user_now))
+        users.close()
+        logger.info(f"Checked {checked_count} users for delivery, {len(due_users)} due")
+        
+        # Fetch one forecast per location bucket, concurrently; the sends below stay sequential on one SMTP session
+        forecasts = fetch_forecasts({
+            forecast_key(user['lat'], user['lon'], user_tz)
+            for user, user_tz, _ in due_users
+            if user['weather_enabled'] and user['location'] and user['lat'] is not None and user['lon'] is not None
+        })
+        # Countdowns for every due user in one query rather than one lookup per send
+        countdowns = get_countdowns_for_users(
+            (user['email'] for user, _, _ in due_users if user['countdown_enabled']), db_path
+        )
+        
+        for user, user_tz, user_now in due_users:
+            email_addr = user['email']
             
             try:
-                user_now = datetime.now(ZoneInfo(user_tz))
-                # Only send if it's 5AM in user's local time (unless force_send is True)
-                if not force_send and user_now.hour != 5:
-                    continue
-                
-                email_body = ""
+                sections = []
                 personality = user['personality'] or 'neutral'
                 language = user['language'] or 'en'
                 location = user['location']
                 
                 # Weather section
                 if user['weather_enabled'] and location and user['lat'] is not None and user['lon'] is not None:
-                    weather = get_weather_forecast(user['lat'], user['lon'], user_tz)
+                    weather = forecasts.get(forecast_key(user['lat'], user['lon'], user_tz))
                     if weather:
-                        email_body += generate_weather_summary(weather, location, personality, language) + "\n\n"
+                        sections.append(generate_weather_summary(weather, location, personality, language) + "\n\n")
                     else:
                         logger.warning(f"No weather data for {email_addr} at {location}")
                 
                 # Countdown section
                 if user['countdown_enabled']:
-                    email_body += generate_countdown_summary(email_addr, user_now, user_tz) + "\n"
+                    sections.append(generate_countdown_summary(email_addr, user_now, user_tz, events=countdowns[email_addr]) + "\n")
                 
                 # Reminder section
                 if user['reminder_enabled']:
                     # TODO: Implement reminder fetching and formatting
-                    email_body += "[Reminders go here]\n"
+                    sections.append("[Reminders go here]\n")
                 
                 # Nameday section
                 nameday_msg = get_nameday_message(language, user_now)
                 if nameday_msg:
-                    email_body += "\n" + nameday_msg + "\n"
+                    sections.append("\n" + nameday_msg + "\n")
                 
                 # Skip sending if no actual content (no active subscriptions)
+                email_body = "".join(sections)
                 if not email_body.strip():
                     logger.info(f"Skipping {email_addr} - no active subscriptions")
                     continue
                 
-                subject = f"Your Daily Brief"
-                footer = f"\n\n---\nHave a great day!\nYour DailyWeather team"
-                full_message = email_body + footer
+                full_message = email_body + DAILY_EMAIL_FOOTER
                 
                 if dry_run:
                     print(f"[DRY RUN] Would send daily email to {email_addr} at {user_now.strftime('%H:%M')} {user_tz}")
@@ -181,12 +340,21 @@ def run_daily_job(config, dry_run=False, db_path=None, force_send=False):
                         'reminder_enabled': bool(user['reminder_enabled']),
                         'weather_data': None,  # Already included in body
                         'email_body': full_message,
-                    })
+                    }, smtp=smtp)
                     if success:
                         sent_count += 1
+                        sent_marks.append((user_now.date().isoformat(), email_addr))
+                        if len(sent_marks) >= MARK_SENT_BATCH:
+                            mark_sent(sent_marks, db_path)
                         logger.info(f"✅ Sent daily brief to {email_addr} ({sent_count} total)")
                     else:
+                        failed_count += 1
                         logger.error(f"❌ Failed to send daily brief to {email_addr}")
+                        # Abort a large batch that is mostly failing (SMTP down, bad credentials)
+                        attempted = sent_count + failed_count
+                        if attempted >= MIN_BATCH_FOR_ABORT and failed_count * 3 > attempted:
+                            logger.error(f"❌ Aborting daily job - {failed_count}/{attempted} sends failed")
+                            break
             except Exception as e:
                 logger.error(f"Error processing user {email_addr}: {e}")
         
@@ -195,5 +363,7 @@ def run_daily_job(config, dry_run=False, db_path=None, force_send=False):
         else:
             logger.info("No emails sent this run")
     finally:
+        smtp.close()
         conn.close()
+        mark_sent(sent_marks, db_path)
 
@@ -1,22 +1,45 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import signal
 import sys
 
-class SafeStreamHandler(logging.StreamHandler):
-    def emit(self, record):
-        try:
-            super().emit(record)
-        except UnicodeEncodeError:
-            msg = self.format(record)
-            safe_msg = msg.encode('ascii', errors='replace').decode('ascii')
-            record.msg = safe_msg
-            super().emit(record)
+# Log calls only enqueue the record; one listener thread does the console and file writes,
+# so scheduler and request threads never wait on disk I/O or each other's handler locks
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.StreamHandler(sys.stderr),
+    logging.FileHandler('app.log', encoding='utf-8')
+)
 
+# The queue handler formats the record before enqueueing it, so the listener's handlers write it as-is
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        SafeStreamHandler(sys.stderr),
-        logging.FileHandler('app.log', encoding='utf-8')
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+
+def _start_listener():
+    """Start the listener thread with signals blocked so it never receives SIGINT/SIGTERM
+    (app.main hands those to a dedicated sigwait thread)."""
+    if not hasattr(signal, "pthread_sigmask"):
+        log_listener.start()
+        return
+    previous = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+    try:
+        log_listener.start()
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, previous)
+
+def configure_console():
+    """Make stderr replace characters the console can't encode (e.g. emojis on a cp1252
+    Windows console) instead of failing the write. Called by the service entry point rather
+    than at import, since it changes stderr for the whole process."""
+    if hasattr(sys.stderr, 'reconfigure'):  # not when swapped for e.g. a StringIO
+        sys.stderr.reconfigure(errors='replace')
+
+_start_listener()
+atexit.register(log_listener.stop)  # drains the queue on exit
 logger = logging.getLogger('reminderAPP')
@@ -4,11 +4,13 @@ Supports multiple languages with localized messages.
 """
 import os
 from datetime import datetime
+from functools import lru_cache
 
 
+@lru_cache(maxsize=8)
 def load_nameday_data(language='en'):
 	"""
-	Load nameday data from namedays.txt for the given language.
+	Load nameday data from namedays.txt for the given language, parsed once per language.
 	Returns tuple: (message_prefix, namedays_dict) or (None, None) if not supported.
 	"""
 	file_path = os.path.join(os.path.dirname(__file__), '..', 'languages', language, 'namedays.txt')
@@ -0,0 +1,227 @@
+"""
+Schema Service Module
+Single source of the database schema, applied as versioned migrations tracked in PRAGMA user_version.
+Used by both the scheduler (app.init_db) and the API (api.init_api_db).
+"""
+from services.logging_service import logger
+
+# Columns added to existing tables after their first release: (name, type/default)
+USER_MIGRATION_COLUMNS = (
+    ('nickname', 'TEXT'),
+    ('email_consent', 'INTEGER DEFAULT 0'),
+    ('terms_accepted', 'INTEGER DEFAULT 0'),
+)
+COUNTDOWN_MIGRATION_COLUMNS = (
+    ('created_at', 'TEXT'),
+)
+# Databases created by the old app.init_db kept coordinates on users instead of the subscription
+WEATHER_SUBSCRIPTION_MIGRATION_COLUMNS = (
+    ('lat', 'REAL'),
+    ('lon', 'REAL'),
+    ('last_sent_date', 'TEXT'),
+)
+
+TABLES = (
+    # Master users table - central user registry
+    ('users', """
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            username TEXT,
+            nickname TEXT,
+            password_hash TEXT,
+            timezone TEXT DEFAULT 'UTC',
+            subscription_type TEXT DEFAULT 'free',
+            weather_enabled INTEGER DEFAULT 0,
+            countdown_enabled INTEGER DEFAULT 0,
+            reminder_enabled INTEGER DEFAULT 0,
+            email_consent INTEGER DEFAULT 0,
+            terms_accepted INTEGER DEFAULT 0,
+            last_sent_date TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """),
+    # Weather subscriptions module table
+    ('weather_subscriptions', """
+        CREATE TABLE IF NOT EXISTS weather_subscriptions (
+            email TEXT PRIMARY KEY,
+            location TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            personality TEXT DEFAULT 'neutral',
+            language TEXT DEFAULT 'en',
+            last_sent_date TEXT,
+            location_query TEXT,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
+        )
+    """),
+    # Countdowns module table
+    ('countdowns', """
+        CREATE TABLE IF NOT EXISTS countdowns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            name TEXT NOT NULL,
+            date TEXT NOT NULL,
+            yearly INTEGER DEFAULT 0,
+            message_before TEXT,
+            message_after TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
+        )
+    """),
+    # Reminders table for calendar service
+    ('reminders', """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            message TEXT NOT NULL,
+            first_run_at TEXT NOT NULL,
+            remaining_repeats INTEGER NOT NULL,
+            last_sent_at TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
+        )
+    """),
+    # Inbox log for deduplication
+    ('inbox_log', """
+        CREATE TABLE IF NOT EXISTS inbox_log (
+            uid TEXT PRIMARY KEY,
+            from_email TEXT NOT NULL,
+            received_at TEXT NOT NULL,
+            subject TEXT,
+            body_hash TEXT
+        )
+    """),
+    # Password reset tokens table
+    ('password_reset_tokens', """
+        CREATE TABLE IF NOT EXISTS password_reset_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            token TEXT UNIQUE NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            expires_at TEXT NOT NULL,
+            used INTEGER DEFAULT 0,
+            used_at TEXT,
+            FOREIGN KEY (email) REFERENCES users(email)
+        )
+    """),
+    # Geocoding results cache (key = normalized location string)
+    ('geocode_cache', """
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            key TEXT PRIMARY KEY,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            display_name TEXT,
+            timezone TEXT,
+            expires_at TEXT NOT NULL
+        )
+    """),
+)
+
+# Secondary indexes: (name, definition)
+INDEXES = (
+    ('idx_users_weather', 'ON users(weather_enabled) WHERE weather_enabled = 1'),
+    ('idx_users_countdown', 'ON users(countdown_enabled) WHERE countdown_enabled = 1'),
+    ('idx_users_reminder', 'ON users(reminder_enabled) WHERE reminder_enabled = 1'),
+    ('idx_countdowns_email', 'ON countdowns(email)'),
+    ('idx_reminders_email_time', 'ON reminders(email, first_run_at)'),
+    ('idx_reset_token', 'ON password_reset_tokens(token)'),
+    ('idx_reset_email', 'ON password_reset_tokens(email)'),
+)
+
+
+def _table_columns(conn, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn, table: str, columns) -> None:
+    """Add only the columns the table lacks, probing its schema once instead of trying every ALTER."""
+    existing = _table_columns(conn, table)
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            logger.info(f"Added {name} column to {table} table")
+
+
+def _create_missing_indexes(conn, indexes) -> None:
+    """Create only the indexes sqlite_master doesn't list yet, so a restart issues no CREATE INDEX at all."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for name, definition in indexes:
+        if name not in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+            logger.info(f"Created index {name}")
+
+
+def _create_base_schema(conn) -> None:
+    """Version 1: every table. Idempotent, so databases created before versioning pass through it."""
+    for table, ddl in TABLES:
+        conn.execute(ddl)
+        logger.info(f"Ensured {table} table exists.")
+
+
+def _add_late_columns(conn) -> None:
+    """Version 2: columns older databases were created without."""
+    _add_missing_columns(conn, 'users', USER_MIGRATION_COLUMNS)
+    _add_missing_columns(conn, 'countdowns', COUNTDOWN_MIGRATION_COLUMNS)
+    _add_missing_columns(conn, 'weather_subscriptions', WEATHER_SUBSCRIPTION_MIGRATION_COLUMNS)
+
+
+def _create_indexes(conn) -> None:
+    """Version 3: secondary indexes, once every column they cover exists."""
+    _create_missing_indexes(conn, INDEXES)
+
+
+def _add_last_sent_index(conn) -> None:
+    """Version 4: index the daily-send marker on weather_subscriptions."""
+    _create_missing_indexes(conn, (('idx_ws_last_sent', 'ON weather_subscriptions(last_sent_date)'),))
+
+
+def _add_user_last_sent_date(conn) -> None:
+    """Version 5: keep the daily-send marker on users, a row every active user has.
+
+    Countdown- and reminder-only users have no weather_subscriptions row, so a marker stored
+    there never stuck for them. Existing markers are carried over.
+    """
+    _add_missing_columns(conn, 'users', (('last_sent_date', 'TEXT'),))
+    conn.execute("""
+        UPDATE users SET last_sent_date = (
+            SELECT ws.last_sent_date FROM weather_subscriptions ws WHERE ws.email = users.email
+        )
+        WHERE last_sent_date IS NULL
+    """)
+
+
+def _add_location_query(conn) -> None:
+    """Version 6: the case-folded location as the user typed it; location holds the geocoder's name."""
+    _add_missing_columns(conn, 'weather_subscriptions', (('location_query', 'TEXT'),))
+
+
+# Append new steps here; a database at user_version N runs MIGRATIONS[N:]
+MIGRATIONS = (
+    _create_base_schema,
+    _add_late_columns,
+    _create_indexes,
+    _add_last_sent_index,
+    _add_user_last_sent_date,
+    _add_location_query,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn) -> int:
+    """Bring the schema up to SCHEMA_VERSION and return the number of migrations applied.
+
+    Runs inside the caller's transaction; an up-to-date database costs a single PRAGMA read.
+    """
+    current = get_schema_version(conn)
+    for version, step in enumerate(MIGRATIONS[current:], start=current + 1):
+        step(conn)
+        logger.info(f"Applied schema migration {version}")
+    if current < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return max(SCHEMA_VERSION - current, 0)
@@ -6,66 +6,76 @@ import os
 import sqlite3
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from services.db_service import get_connection
 
-def add_or_update_subscriber(email, location, lat, lon, personality, language, timezone, db_path=None):
-    """Add or update a weather subscription. Creates user if doesn't exist."""
+# SQL used on every subscription call, kept as module constants so the
+# per-connection statement cache always sees the same strings
+SQL_UPSERT_USER_WEATHER = """
+    INSERT INTO users (email, timezone, weather_enabled, created_at, updated_at)
+    VALUES (?, ?, 1, ?, ?)
+    ON CONFLICT(email) DO UPDATE SET
+        timezone=excluded.timezone,
+        weather_enabled=1,
+        updated_at=excluded.updated_at
+"""
+SQL_UPSERT_SUB = """
+    INSERT INTO weather_subscriptions (email, location, lat, lon, personality, language, location_query, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(email) DO UPDATE SET
+        location=excluded.location,
+        location_query=excluded.location_query,
+        lat=excluded.lat,
+        lon=excluded.lon,
+        personality=excluded.personality,
+        language=excluded.language,
+        updated_at=excluded.updated_at
+"""
+SQL_RETURNING_SUB = " RETURNING location, lat, lon, personality, language"
+SQL_SELECT_SUB_BY_EMAIL = """
+    SELECT ws.location, ws.lat, ws.lon, ws.personality, 
+           COALESCE(ws.language, 'en') as language,
+           COALESCE(u.timezone, 'UTC') as timezone,
+           ws.location_query
+    FROM weather_subscriptions ws
+    JOIN users u ON ws.email = u.email
+    WHERE ws.email = ?
+"""
+
+# UPSERT ... RETURNING needs SQLite 3.35+
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+def add_or_update_subscriber(email, location, lat, lon, personality, language, timezone, db_path=None, location_query=None):
+    """Add or update a weather subscription. Creates user if doesn't exist. Returns the saved subscription row.
+
+    location_query is the user's input that geocoded to location, kept so an unchanged resubmission can skip geocoding.
+    """
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     conn.row_factory = sqlite3.Row
     try:
         now = datetime.now(ZoneInfo(timezone)).isoformat() if timezone else datetime.utcnow().isoformat()
         
-        # Ensure user exists in master table
-        user_exists = conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone()
-        if not user_exists:
-            # Create new user
-            print(f"[SUBSCRIPTION] Creating new user: {email}")
-            cursor = conn.execute("""
-                INSERT INTO users (email, timezone, weather_enabled, created_at, updated_at)
-                VALUES (?, ?, 1, ?, ?)
-            """, (email, timezone, now, now))
-            print(f"[SUBSCRIPTION] User created, rowcount: {cursor.rowcount}")
-        else:
-            # Update existing user
-            print(f"[SUBSCRIPTION] Updating existing user: {email}, setting weather_enabled=1")
-            cursor = conn.execute("""
-                UPDATE users SET timezone = ?, weather_enabled = 1, updated_at = ?
-                WHERE email = ?
-            """, (timezone, now, email))
-            print(f"[SUBSCRIPTION] User updated, rowcount: {cursor.rowcount}")
-            if cursor.rowcount == 0:
-                print(f"[SUBSCRIPTION] WARNING: UPDATE affected 0 rows for {email}")
+        # Create the user or enable weather on the existing one in a single statement
+        print(f"[SUBSCRIPTION] Upserting user: {email}, setting weather_enabled=1")
+        conn.execute(SQL_UPSERT_USER_WEATHER, (email, timezone, now, now))
         
         # Insert or update weather subscription
         print(f"[SUBSCRIPTION] Creating/updating weather subscription for {email}")
-        cursor = conn.execute("""
-            INSERT INTO weather_subscriptions (email, location, lat, lon, personality, language, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(email) DO UPDATE SET
-                location=excluded.location,
-                lat=excluded.lat,
-                lon=excluded.lon,
-                personality=excluded.personality,
-                language=excluded.language,
-                updated_at=excluded.updated_at
-        """, (email, location, lat, lon, personality, language, now))
-        print(f"[SUBSCRIPTION] Weather subscription saved, rowcount: {cursor.rowcount}")
-        
-        conn.commit()
-        print(f"[SUBSCRIPTION] Transaction committed successfully for {email}")
+        if HAS_RETURNING:
+            # The saved row comes back from the upsert itself, no verification query needed
+            saved = conn.execute(SQL_UPSERT_SUB + SQL_RETURNING_SUB, (email, location, lat, lon, personality, language, location_query, now)).fetchone()
+            conn.commit()
+        else:
+            conn.execute(SQL_UPSERT_SUB, (email, location, lat, lon, personality, language, location_query, now))
+            conn.commit()
+            saved = conn.execute(SQL_SELECT_SUB_BY_EMAIL, (email,)).fetchone()
         
-        # Verify the data was saved correctly
-        verify = conn.execute("""
-            SELECT u.email, u.weather_enabled, ws.location
-            FROM users u
-            LEFT JOIN weather_subscriptions ws ON u.email = ws.email
-            WHERE u.email = ?
-        """, (email,)).fetchone()
-        if verify:
-            print(f"[SUBSCRIPTION] Verification: email={verify['email']}, weather_enabled={verify['weather_enabled']}, location={verify['location']}")
+        if saved:
+            print(f"[SUBSCRIPTION] Saved subscription for {email}: location={saved['location']}, personality={saved['personality']}, language={saved['language']}")
         else:
             print(f"[SUBSCRIPTION] ERROR: Could not verify data for {email}")
+        return saved
             
     except Exception as e:
         print(f"[SUBSCRIPTION] ERROR: Exception occurred: {e}")
@@ -79,7 +89,7 @@ def delete_subscriber(email, db_path=None):
     """Delete a weather subscription and disable weather module for user."""
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     try:
         # Delete weather subscription
         cursor = conn.execute("DELETE FROM weather_subscriptions WHERE email = ?", (email,))
@@ -101,17 +111,10 @@ def get_subscriber(email, db_path=None):
     """Get weather subscription info by email."""
     if db_path is None:
         db_path = os.getenv("APP_DB_PATH", "app.db")
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path, readonly=True)
     conn.row_factory = sqlite3.Row
     try:
-        result = conn.execute("""
-            SELECT ws.location, ws.lat, ws.lon, ws.personality, 
-                   COALESCE(ws.language, 'en') as language,
-                   COALESCE(u.timezone, 'UTC') as timezone
-            FROM weather_subscriptions ws
-            JOIN users u ON ws.email = u.email
-            WHERE ws.email = ?
-        """, (email,)).fetchone()
+        result = conn.execute(SQL_SELECT_SUB_BY_EMAIL, (email,)).fetchone()
         return result
     finally:
         conn.close()
@@ -6,6 +6,7 @@ import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 import bcrypt
+from services.db_service import get_connection
 
 """
 User Service Module
@@ -31,7 +32,7 @@ def register_user(email: str, password: str, nickname: str = None, username: str
     """Register a new user with email and password."""
     password_hash = hash_password(password)
     now = datetime.utcnow().isoformat()
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path())
     conn.row_factory = sqlite3.Row
     try:
         # Check if user already exists
@@ -58,7 +59,7 @@ def register_user(email: str, password: str, nickname: str = None, username: str
 
 def authenticate_user(email: str, password: str) -> Optional[dict]:
     """Authenticate user and return user data if successful."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path(), readonly=True)
     conn.row_factory = sqlite3.Row
     try:
         row = conn.execute("""
@@ -84,7 +85,7 @@ def authenticate_user(email: str, password: str) -> Optional[dict]:
 
 def get_user_by_email(email: str) -> Optional[dict]:
     """Get user data by email."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path(), readonly=True)
     conn.row_factory = sqlite3.Row
     try:
         row = conn.execute("""
@@ -106,7 +107,7 @@ def get_user_by_email(email: str) -> Optional[dict]:
 
 def get_user_by_email(email: str) -> Optional[dict]:
     """Get user data by email."""
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection(get_db_path(), readonly=True)
     conn.row_factory = sqlite3.Row
     try:
         row = conn.execute("""
@@ -1,13 +1,43 @@
 import os
+import itertools
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sqlite3
-from datetime import datetime
+# timezone is aliased: several functions here take a `timezone` (IANA name) argument
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from services.namedays_service import get_nameday_message
+from services.db_service import get_connection
+
+# Optional faster JSON parser for API responses
+try:
+	import orjson
+except ImportError:
+	orjson = None
 # from services.summary_service import generate_weather_summary  # merged below
 
+# Shared HTTP session: keeps TCP/TLS connections to Open-Meteo alive across calls.
+# pool_maxsize matches the daily job's concurrent forecast fetches; transient errors retry with backoff.
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(
+	pool_connections=4,
+	pool_maxsize=16,
+	max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+def parse_json_response(response):
+	"""Decode an HTTP JSON body, with orjson when it is installed."""
+	if orjson is None:
+		return response.json()
+	return orjson.loads(response.content)
+
+@lru_cache(maxsize=8)
 def load_clothing_messages(language='en'):
-	"""Load clothing advice messages from clothing.txt for the given language."""
+	"""Load clothing advice messages from clothing.txt for the given language, parsed once per language."""
 	clothing_dict = {}
 	file_path = os.path.join(os.path.dirname(__file__), '..', 'languages', language, 'clothing.txt')
 	try:
@@ -31,6 +61,76 @@ def load_clothing_messages(language='en'):
 			return load_clothing_messages('en')  # Fallback to English
 	return clothing_dict
 
+# Weather condition decision table: first matching rule wins, keys match weather_messages.txt.
+# Predicates take (temp_max, temp_min, precipitation, wind_speed, rain_prob).
+WEATHER_CONDITION_RULES = (
+	# Combined conditions
+	('sunny_hot', lambda tx, tn, p, w, rp: tx >= 30 and rp < 20),
+	('cold_windy', lambda tx, tn, p, w, rp: tx <= 5 and w >= 15),
+	('rainy_cold', lambda tx, tn, p, w, rp: tx <= 5 and p >= 2),
+	# Extreme conditions
+	('heatwave', lambda tx, tn, p, w, rp: tx >= 36),
+	('blizzard', lambda tx, tn, p, w, rp: tn <= -15),
+	# Precipitation
+	('thunderstorm', lambda tx, tn, p, w, rp: p >= 10 and rp >= 70),
+	('heavy_rain', lambda tx, tn, p, w, rp: p >= 7),
+	('raining', lambda tx, tn, p, w, rp: p >= 2),
+	('snowing', lambda tx, tn, p, w, rp: tx <= 2 and p > 0.5),
+	# Temperature
+	('freezing', lambda tx, tn, p, w, rp: tn < 0 and p <= 0.1),
+	('hot', lambda tx, tn, p, w, rp: tx >= 30),
+	('cold', lambda tx, tn, p, w, rp: tx <= 5),
+	# Wind, fog, humidity
+	('windy', lambda tx, tn, p, w, rp: w >= 15),
+	('foggy', lambda tx, tn, p, w, rp: tn >= -2 and tx <= 8 and p < 0.2 and w < 8 and rp >= 60),
+	('humid', lambda tx, tn, p, w, rp: rp >= 70 and p < 0.2),
+	# Pleasant weather
+	('dry', lambda tx, tn, p, w, rp: p < 0.05 and tx >= 25),
+	('sunny', lambda tx, tn, p, w, rp: tx >= 20 and rp < 20 and p < 0.1),
+	('mild', lambda tx, tn, p, w, rp: tx >= 10 and rp < 40 and p < 0.2),
+	('cloudy', lambda tx, tn, p, w, rp: rp >= 30 or p > 0.05),
+)
+
+def detect_weather_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob):
+	"""Return the weather condition key for the given values (see WEATHER_CONDITION_RULES)."""
+	for condition, matches in WEATHER_CONDITION_RULES:
+		if matches(temp_max, temp_min, precipitation, wind_speed, rain_prob):
+			return condition
+	return 'default'
+
+# Clothing advice decision table: first matching rule wins, keys match clothing.txt.
+# Priority order: extreme conditions > precipitation > temperature > wind/fog/humidity > mild.
+CLOTHING_ADVICE_RULES = (
+	# Extreme conditions
+	('blizzard', lambda tx, tn, p, w, rp: tn <= -15),
+	('heatwave', lambda tx, tn, p, w, rp: tx >= 36),
+	# Heavy precipitation + temperature
+	('heavy_rain', lambda tx, tn, p, w, rp: p >= 7),
+	('snowing', lambda tx, tn, p, w, rp: tx <= 2 and p > 0.5),
+	# Moderate conditions (combined temp + other factors)
+	('rainy_cold', lambda tx, tn, p, w, rp: tx <= 5 and p >= 2),
+	('cold_windy', lambda tx, tn, p, w, rp: tx <= 5 and w >= 15),
+	# Precipitation only
+	('raining', lambda tx, tn, p, w, rp: p >= 2),
+	# Temperature
+	('freezing', lambda tx, tn, p, w, rp: tn < 0 and p <= 0.1),
+	('cold', lambda tx, tn, p, w, rp: tx <= 5),
+	('sunny_hot', lambda tx, tn, p, w, rp: tx >= 30 and rp < 20),
+	('hot', lambda tx, tn, p, w, rp: tx >= 25),
+	# Wind, fog, humidity
+	('windy', lambda tx, tn, p, w, rp: w >= 15),
+	('foggy', lambda tx, tn, p, w, rp: tn >= -2 and tx <= 8 and p < 0.2 and w < 8 and rp >= 60),
+	('humid', lambda tx, tn, p, w, rp: rp >= 70 and p < 0.2),
+	('dry', lambda tx, tn, p, w, rp: p < 0.05 and tx >= 25),
+)
+
+def detect_clothing_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob):
+	"""Return the clothing.txt key for the given values (see CLOTHING_ADVICE_RULES); 'mild' if none match."""
+	for condition, matches in CLOTHING_ADVICE_RULES:
+		if matches(temp_max, temp_min, precipitation, wind_speed, rain_prob):
+			return condition
+	return 'mild'
+
 def generate_weather_summary(weather, location, personality, language):
 
 
@@ -43,175 +143,38 @@ def generate_weather_summary(weather, location, personality, language):
 	wind_speed = weather.get('wind_speed_max', 5)
 	rain_prob = min(int((precipitation / 1.5) * 100), 100) if precipitation else 0
 
-	# Load clothing messages for the user's language
-	clothing_dict = load_clothing_messages(language)
-
-	# Load weather_messages.txt (cache for performance)
-	@lru_cache(maxsize=8)
-	def load_weather_messages(lang):
-		path = os.path.join(os.path.dirname(__file__), f'../languages/{lang}/weather_messages.txt')
-		messages = {}
-		if not os.path.exists(path):
-			return messages
-		with open(path, encoding='utf-8') as f:
-			for line in f:
-				line = line.strip()
-				if not line or line.startswith('#'):
-					continue
-				parts = line.split('|')
-				if len(parts) < 2:
-					continue
-				key = parts[0]
-				personalities = ['neutral', 'cute', 'brutal', 'emuska']
-				msg_map = dict(zip(personalities, parts[1:]))
-				messages[key] = msg_map
-		return messages
-
-	messages = load_weather_messages(language)
-	def get_msg(key, personality):
-		msg_map = messages.get(key, {})
-		return msg_map.get(personality) or msg_map.get('neutral') or messages.get('default', {}).get(personality, '')
-
 	# Compose message
 	intro = f"Today's weather for {location}:"
 	temp_line = f"🌡️ Temperature: High {temp_max}°C / Low {temp_min}°C"
 	rain_line = f"🌧️ Rain probability: {rain_prob}% (≈{precipitation} mm)"
 	wind_line = f"💨 Wind: up to {wind_speed} km/h"
 
-	# Determine weather condition using only keys from weather_messages.txt
-	def get_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob):
-		# Combined conditions
-		if temp_max >= 30 and rain_prob < 20:
-			return 'sunny_hot'
-		if temp_max <= 5 and wind_speed >= 15:
-			return 'cold_windy'
-		if temp_max <= 5 and precipitation >= 2:
-			return 'rainy_cold'
-		# Extreme conditions
-		if temp_max >= 36:
-			return 'heatwave'
-		if temp_min <= -15:
-			return 'blizzard'
-		# Thunderstorm
-		if precipitation >= 10 and rain_prob >= 70:
-			return 'thunderstorm'
-		# Heavy rain
-		if precipitation >= 7:
-			return 'heavy_rain'
-		# Raining
-		if precipitation >= 2:
-			return 'raining'
-		# Snowing
-		if temp_max <= 2 and precipitation > 0.5:
-			return 'snowing'
-		# Freezing
-		if temp_min < 0 and precipitation <= 0.1:
-			return 'freezing'
-		# Hot
-		if temp_max >= 30:
-			return 'hot'
-		# Cold
-		if temp_max <= 5:
-			return 'cold'
-		# Windy
-		if wind_speed >= 15:
-			return 'windy'
-		# Foggy
-		if temp_min >= -2 and temp_max <= 8 and precipitation < 0.2 and wind_speed < 8 and rain_prob >= 60:
-			return 'foggy'
-		# Humid
-		if rain_prob >= 70 and precipitation < 0.2:
-			return 'humid'
-		# Dry
-		if precipitation < 0.05 and temp_max >= 25:
-			return 'dry'
-		# Sunny
-		if temp_max >= 20 and rain_prob < 20 and precipitation < 0.1:
-			return 'sunny'
-		# Mild
-		if temp_max >= 10 and rain_prob < 40 and precipitation < 0.2:
-			return 'mild'
-		# Cloudy
-		if rain_prob >= 30 or precipitation > 0.05:
-			return 'cloudy'
-		# Fallback
-		return 'default'
-
-	condition = get_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob)
-	condition_msg = get_msg(condition, personality)
-
-	# Clothing suggestion logic: pick the SINGLE most relevant advice based on priority
-	# Priority order: extreme conditions > precipitation > temperature > default
-	clothing_msg = ''
-	
-	# 1. EXTREME CONDITIONS (highest priority)
-	if temp_min <= -15:
-		clothing_msg = clothing_dict.get('blizzard', {}).get(personality, '')
-	elif temp_max >= 36:
-		clothing_msg = clothing_dict.get('heatwave', {}).get(personality, '')
-	# 2. HEAVY PRECIPITATION + TEMPERATURE
-	elif precipitation >= 7:
-		clothing_msg = clothing_dict.get('heavy_rain', {}).get(personality, '')
-	elif temp_max <= 2 and precipitation > 0.5:
-		clothing_msg = clothing_dict.get('snowing', {}).get(personality, '')
-	# 3. MODERATE CONDITIONS (combined temp + other factors)
-	elif temp_max <= 5 and precipitation >= 2:
-		clothing_msg = clothing_dict.get('rainy_cold', {}).get(personality, '')
-	elif temp_max <= 5 and wind_speed >= 15:
-		clothing_msg = clothing_dict.get('cold_windy', {}).get(personality, '')
-	# 4. PRECIPITATION ONLY
-	elif precipitation >= 2:
-		clothing_msg = clothing_dict.get('raining', {}).get(personality, '')
-	# 5. TEMPERATURE CONDITIONS
-	elif temp_min < 0 and precipitation <= 0.1:
-		clothing_msg = clothing_dict.get('freezing', {}).get(personality, '')
-	elif temp_max <= 5:
-		clothing_msg = clothing_dict.get('cold', {}).get(personality, '')
-	elif temp_max >= 30 and rain_prob < 20:
-		clothing_msg = clothing_dict.get('sunny_hot', {}).get(personality, '')
-	elif temp_max >= 25:
-		clothing_msg = clothing_dict.get('hot', {}).get(personality, '')
-	# 6. WIND/FOG/HUMIDITY
-	elif wind_speed >= 15:
-		clothing_msg = clothing_dict.get('windy', {}).get(personality, '')
-	elif temp_min >= -2 and temp_max <= 8 and precipitation < 0.2 and wind_speed < 8 and rain_prob >= 60:
-		clothing_msg = clothing_dict.get('foggy', {}).get(personality, '')
-	elif rain_prob >= 70 and precipitation < 0.2:
-		clothing_msg = clothing_dict.get('humid', {}).get(personality, '')
-	elif precipitation < 0.05 and temp_max >= 25:
-		clothing_msg = clothing_dict.get('dry', {}).get(personality, '')
-	# 7. DEFAULT (mild weather)
-	else:
-		clothing_msg = clothing_dict.get('mild', {}).get(personality, '')
+	# Pick the SINGLE most relevant clothing advice (see CLOTHING_ADVICE_RULES)
+	clothing_condition = detect_clothing_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob)
+	clothing_msg = load_clothing_messages(language).get(clothing_condition, {}).get(personality, '')
 
 	# Build summary: intro, weather details, then clothing advice with clear label
-	summary = f"{intro}\n\n{temp_line}\n{rain_line}\n{wind_line}\n\n"
+	parts = [intro, "\n\n", temp_line, "\n", rain_line, "\n", wind_line, "\n\n"]
 	
-	# Add clothing suggestion with clear label (avoid duplicate of condition_msg)
+	# Add clothing suggestion with clear label
 	if clothing_msg.strip():
-		summary += f"👔 Clothing suggestion:\n{clothing_msg}\n"
+		parts.append(f"👔 Clothing suggestion:\n{clothing_msg}\n")
 	
-	return summary
+	return "".join(parts)
 
 def generate_countdown_summary(countdowns, language='en'):
 	if not countdowns:
 		return "No active countdowns."
-	summary = "⏳ Countdown reminders:\n"
-	for cd in countdowns:
-		name = cd.get('name', 'Event')
-		days = cd.get('days_left', '?')
-		summary += f"• {name}: {days} days left\n"
-	return summary
+	lines = ["⏳ Countdown reminders:"]
+	lines.extend(f"• {cd.get('name', 'Event')}: {cd.get('days_left', '?')} days left" for cd in countdowns)
+	return "\n".join(lines) + "\n"
 
 def generate_reminder_summary(reminders, language='en'):
 	if not reminders:
 		return "No active reminders."
-	summary = "🔔 Reminders:\n"
-	for r in reminders:
-		text = r.get('text', 'Reminder')
-		time = r.get('time', '')
-		summary += f"• {text} {time}\n"
-	return summary
+	lines = ["🔔 Reminders:"]
+	lines.extend(f"• {r.get('text', 'Reminder')} {r.get('time', '')}" for r in reminders)
+	return "\n".join(lines) + "\n"
 
 def generate_daily_summary(weather=None, location=None, personality='neutral', language='en', countdowns=None, reminders=None):
 	sections = []
@@ -234,11 +197,40 @@ def generate_daily_summary(weather=None, location=None, personality='neutral', l
 
 
 
+# Forecasts are cached in memory briefly so subscribers sharing a location within
+# the hour (separate timezone jobs, the safety net, API previews) reuse one API call
+FORECAST_CACHE_TTL = timedelta(hours=1)
+FORECAST_MEMORY_SIZE = 1024
+_forecast_memory = OrderedDict()
+_forecast_lock = threading.Lock()  # the daily job fetches forecasts from several threads
+
+def _local_date(timezone):
+	try:
+		return datetime.now(ZoneInfo(timezone)).date()
+	except (ZoneInfoNotFoundError, ValueError, TypeError):
+		return datetime.now(dt_timezone.utc).date()
+
 def get_weather_forecast(lat, lon, timezone):
 	"""
 	Fetch daily weather forecast for the given location using Open-Meteo API.
 	Returns dict with temp_max, temp_min, precipitation_sum, wind_speed_max for today.
+	Successful lookups are cached for FORECAST_CACHE_TTL, and never past the local midnight.
 	"""
+	key = (lat, lon, timezone, _local_date(timezone))
+	now = datetime.now(dt_timezone.utc)
+	with _forecast_lock:
+		cached = _forecast_memory.get(key)
+	if cached and cached[0] > now:
+		return cached[1]
+	forecast = _fetch_weather_forecast(lat, lon, timezone)
+	if forecast:
+		with _forecast_lock:
+			if key not in _forecast_memory and len(_forecast_memory) >= FORECAST_MEMORY_SIZE:
+				_forecast_memory.popitem(last=False)  # drop the oldest entry
+			_forecast_memory[key] = (now + FORECAST_CACHE_TTL, forecast)
+	return forecast
+
+def _fetch_weather_forecast(lat, lon, timezone):
 	url = "https://api.open-meteo.com/v1/forecast"
 	params = {
 		"latitude": lat,
@@ -247,9 +239,9 @@ def get_weather_forecast(lat, lon, timezone):
 		"timezone": timezone,
 	}
 	try:
-		response = requests.get(url, params=params, timeout=10)
+		response = http_session.get(url, params=params, timeout=10)
 		response.raise_for_status()
-		data = response.json()
+		data = parse_json_response(response)
 		daily = data.get("daily", {})
 		# Get today's index (assume first in list)
 		temp_max = daily.get("temperature_2m_max", [None])[0]
@@ -266,10 +258,81 @@ def get_weather_forecast(lat, lon, timezone):
 		print(f"Weather API error for ({lat}, {lon}, {timezone}): {e}")
 		return None
 
+# Geocoding results are cached in memory and in the geocode_cache table
+GEOCODE_CACHE_TTL = timedelta(days=30)
+GEOCODE_MEMORY_SIZE = 1024
+_geocode_memory = OrderedDict()
+_geocode_lock = threading.Lock()  # shared by the API and web request threads
+
+def _read_geocode_cache(key, db_path=None):
+	"""Return a cached (lat, lon, display_name, timezone_str) or None, checking memory then SQLite."""
+	now = datetime.now(dt_timezone.utc)
+	with _geocode_lock:
+		cached = _geocode_memory.get(key)
+	if cached and cached[0] > now:
+		return cached[1]
+	try:
+		conn = get_connection(db_path, readonly=True)
+		try:
+			row = conn.execute(
+				"SELECT lat, lon, display_name, timezone, expires_at FROM geocode_cache WHERE key = ? AND expires_at > ?",
+				(key, now.isoformat())
+			).fetchone()
+		finally:
+			conn.close()
+	except sqlite3.Error:
+		return None  # cache table missing (database not initialized) - just geocode
+	if not row:
+		return None
+	result = tuple(row[:4])
+	expires_at = datetime.fromisoformat(row[4])
+	if expires_at.tzinfo is None:
+		expires_at = expires_at.replace(tzinfo=dt_timezone.utc)  # older rows were stored as naive UTC
+	_remember_geocode(key, result, expires_at)
+	return result
+
+def _remember_geocode(key, result, expires_at):
+	with _geocode_lock:
+		if key not in _geocode_memory and len(_geocode_memory) >= GEOCODE_MEMORY_SIZE:
+			_geocode_memory.popitem(last=False)  # drop the oldest entry
+		_geocode_memory[key] = (expires_at, result)
+
+def _write_geocode_cache(key, result, db_path=None):
+	expires_at = datetime.now(dt_timezone.utc) + GEOCODE_CACHE_TTL
+	_remember_geocode(key, result, expires_at)
+	try:
+		conn = get_connection(db_path)
+		try:
+			conn.execute(
+				"INSERT OR REPLACE INTO geocode_cache (key, lat, lon, display_name, timezone, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+				(key, *result, expires_at.isoformat())
+			)
+			conn.commit()
+		finally:
+			conn.close()
+	except sqlite3.Error as e:
+		print(f"Could not store geocode cache entry for '{key}': {e}")
+
 def geocode_location(location: str):
 	"""
 	Geocode a location string to (lat, lon, display_name, timezone_str) using Open-Meteo API.
 	Returns (lat, lon, display_name, timezone_str) or None if not found.
+	Successful lookups are cached for GEOCODE_CACHE_TTL, keyed by the normalized location.
+	"""
+	key = location.strip().lower()
+	if not key:
+		return None
+	result = _read_geocode_cache(key)
+	if result:
+		return result
+	result = _geocode_uncached(location)
+	if result:
+		_write_geocode_cache(key, result)
+	return result
+
+def _geocode_uncached(location: str):
+	"""
+	Look a location up with the Open-Meteo geocoding API.
 	
 	Implements fallback strategy:
 	1. Try full location string
@@ -286,9 +349,9 @@ def geocode_location(location: str):
 			'format': 'json'
 		}
 		try:
-			response = requests.get(url, params=params, timeout=10)
+			response = http_session.get(url, params=params, timeout=10)
 			response.raise_for_status()
-			data = response.json()
+			data = parse_json_response(response)
 			if data.get('results'):
 				result = data['results'][0]
 				lat = result['latitude']
@@ -336,7 +399,7 @@ Handles daily weather job and subscriber listing for the weather app.
 
 def list_subscribers(db_path="app.db"):
 	"""List all weather subscribers from unified database."""
-	conn = sqlite3.connect(db_path)
+	conn = get_connection(db_path, readonly=True)
 	conn.row_factory = sqlite3.Row
 	try:
 		cursor = conn.execute("""
@@ -345,12 +408,12 @@ def list_subscribers(db_path="app.db"):
 			JOIN weather_subscriptions ws ON u.email = ws.email
 			WHERE u.weather_enabled = 1
 		""")
-		subscribers = cursor.fetchall()
-		if not subscribers:
+		first = cursor.fetchone()
+		if first is None:
 			print("No weather subscribers found.")
 			return
 		print("Weather Subscribers:")
-		for sub in subscribers:
+		for sub in itertools.chain((first,), cursor):
 			print(f"- {sub['email']} | {sub['location']} | {sub['lat']}, {sub['lon']} | {sub['personality']} | {sub['language']} | {sub['timezone']}")
 	finally:
 		conn.close()
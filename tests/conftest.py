@@ -15,6 +15,7 @@ from unittest.mock import Mock, patch, MagicMock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import init_db, Config
+from services.db_service import close_pools
 
 
 @pytest.fixture(scope='function')
@@ -34,6 +35,7 @@ def test_db():
     yield db_path
     
     # Cleanup
+    close_pools()
     if old_db_path:
         os.environ['APP_DB_PATH'] = old_db_path
     else:
@@ -0,0 +1,44 @@
+"""
+Test the weather subscription API endpoint's reuse of stored coordinates.
+"""
+import pytest
+from unittest.mock import patch
+import api
+
+BRATISLAVA = (48.1486, 17.1077, 'Bratislava, Bratislava Region, Slovakia', 'Europe/Bratislava')
+
+
+@pytest.fixture
+def client(test_db):
+    api.app.config['TESTING'] = True
+    api.limiter.enabled = False
+    with api.app.test_client() as client:
+        yield client
+    api.limiter.enabled = True
+
+
+def subscribe(client, location, personality='neutral'):
+    return client.post('/api/weather/subscriptions', json={
+        'email': 'user@example.com',
+        'location': location,
+        'personality': personality,
+    }, headers={'X-API-Key': next(iter(api.API_KEYS))})
+
+
+@pytest.mark.unit
+def test_unchanged_location_is_not_geocoded_again(client):
+    with patch.object(api, 'geocode_location', return_value=BRATISLAVA) as geocode:
+        assert subscribe(client, 'bratislava').status_code == 201
+        assert subscribe(client, ' Bratislava ', personality='cute').status_code == 201
+        assert subscribe(client, BRATISLAVA[2]).status_code == 201
+    geocode.assert_called_once_with('bratislava')
+
+
+@pytest.mark.unit
+def test_changed_location_is_geocoded(client):
+    prague = (50.0755, 14.4378, 'Prague, Czechia', 'Europe/Prague')
+    with patch.object(api, 'geocode_location', side_effect=[BRATISLAVA, prague]) as geocode:
+        subscribe(client, 'Bratislava')
+        response = subscribe(client, 'Prague')
+    assert geocode.call_count == 2
+    assert response.get_json()['location'] == 'Prague, Czechia'
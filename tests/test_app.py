@@ -3,7 +3,8 @@ import threading
 import pytest
 import logging
 import sys
-from app import SafeStreamHandler, Config, load_env, init_db, main
+from app import Config, load_env, init_db, main
+from services.logging_service import logger
  
 def test_config_env(monkeypatch):
     monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
@@ -28,11 +29,22 @@ def test_init_db(tmp_path):
     init_db(str(db_path))
     assert db_path.exists()
 
-def test_safe_stream_handler_unicode():
-    handler = SafeStreamHandler(sys.stderr)
-    record = logging.LogRecord("test", logging.INFO, "", 0, "emoji: 😃", None, None)
-    # Should not raise
-    handler.emit(record)
+def test_logging_unicode():
+    # Should not raise, whatever the console encoding
+    logger.info("emoji: 😃")
+
+def test_configure_console(monkeypatch):
+    import io
+    from services.logging_service import configure_console
+    monkeypatch.setattr(sys, 'stderr', io.StringIO())  # no reconfigure(), e.g. captured output
+    configure_console()
+    
+    console = io.TextIOWrapper(io.BytesIO(), encoding='cp1252')
+    monkeypatch.setattr(sys, 'stderr', console)
+    configure_console()
+    console.write("emoji: 😃")
+    console.flush()
+    assert console.buffer.getvalue() == b"emoji: ?"
 
 import pytest
 
@@ -50,3 +62,27 @@ def test_main_runs(monkeypatch):
 
 
 # Add more tests for threading, error states, and CLI as needed
+
+
+def test_invalid_timezone_logged_once(test_db):
+    import sqlite3
+    from datetime import datetime, timezone
+    from unittest.mock import patch
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from app import schedule_daily_jobs, _rejected_timezones
+    now = datetime.now(timezone.utc).isoformat()
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO users (email, timezone, weather_enabled, created_at, updated_at) VALUES (?, 'Mars/Olympus_Mons', 1, ?, ?)",
+                 ("martian@example.com", now, now))
+    conn.commit()
+    conn.close()
+    
+    scheduler = BackgroundScheduler()
+    try:
+        with patch('app.logger') as log:
+            schedule_daily_jobs(scheduler, Config(), test_db)
+            schedule_daily_jobs(scheduler, Config(), test_db)
+        log.error.assert_called_once()
+        assert scheduler.get_jobs() == []
+    finally:
+        _rejected_timezones.discard('Mars/Olympus_Mons')
@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime, timedelta
-from services.countdown_service import CountdownEvent
+from services.countdown_service import CountdownEvent, add_countdown, get_countdowns_for_users, get_user_countdowns
 
 class TestCountdownService(unittest.TestCase):
     def test_yearly_countdown(self):
@@ -25,5 +25,17 @@ class TestCountdownService(unittest.TestCase):
         msg = event.get_countdown_message(today)
         self.assertIsNone(msg)
 
+
+def test_get_countdowns_for_users_groups_by_email(test_db):
+    add_countdown(CountdownEvent("Christmas", "2025-12-24", True, "a@example.com"), test_db)
+    add_countdown(CountdownEvent("Trip", "2026-03-01", False, "a@example.com"), test_db)
+    add_countdown(CountdownEvent("Birthday", "2026-05-05", True, "b@example.com"), test_db)
+    
+    countdowns = get_countdowns_for_users(["a@example.com", "b@example.com", "c@example.com"], test_db)
+    assert sorted(e.name for e in countdowns["a@example.com"]) == ["Christmas", "Trip"]
+    assert [e.name for e in countdowns["b@example.com"]] == [e.name for e in get_user_countdowns("b@example.com", test_db)]
+    assert countdowns["c@example.com"] == []
+    assert get_countdowns_for_users([], test_db) == {}
+
 if __name__ == "__main__":
     unittest.main()
@@ -78,3 +78,37 @@ def test_daily_job_includes_weather_summary(test_db, mock_config, mock_send_emai
     """Test that daily job includes weather summary in email body."""
     if not is_schema_compatible(test_db):
         pytest.skip("Schema not compatible - run_daily_job requires users + weather tables")
+
+
+def _add_user(db_path, email, tz, weather_enabled=1):
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (email, timezone, weather_enabled, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                 (email, tz, weather_enabled, now, now))
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.unit
+def test_schedule_daily_jobs_one_job_per_active_timezone(test_db, mock_config):
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from app import schedule_daily_jobs, DAILY_JOB_PREFIX
+    
+    _add_user(test_db, "a@example.com", "Europe/Bratislava")
+    _add_user(test_db, "b@example.com", "Europe/Bratislava")
+    _add_user(test_db, "c@example.com", "America/New_York")
+    _add_user(test_db, "d@example.com", "Asia/Tokyo", weather_enabled=0)
+    _add_user(test_db, "e@example.com", "Not/A_Zone")
+    
+    scheduler = BackgroundScheduler()
+    schedule_daily_jobs(scheduler, mock_config, test_db)
+    assert sorted(job.id for job in scheduler.get_jobs()) == [
+        DAILY_JOB_PREFIX + "America/New_York", DAILY_JOB_PREFIX + "Europe/Bratislava"]
+    
+    # Timezones without active users lose their job on the next sync
+    conn = sqlite3.connect(test_db)
+    conn.execute("UPDATE users SET weather_enabled = 0 WHERE email = 'c@example.com'")
+    conn.commit()
+    conn.close()
+    schedule_daily_jobs(scheduler, mock_config, test_db)
+    assert [job.id for job in scheduler.get_jobs()] == [DAILY_JOB_PREFIX + "Europe/Bratislava"]
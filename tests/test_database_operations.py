@@ -16,6 +16,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from services.user_service import register_user, authenticate_user, get_user_by_email, hash_password
 from services.subscription_service import add_or_update_subscriber, delete_subscriber, get_subscriber
 from services.countdown_service import add_countdown, get_user_countdowns, delete_countdown, CountdownEvent
+from services.db_service import close_pools
 
 
 @pytest.fixture
@@ -57,6 +58,7 @@ def test_db():
             personality TEXT DEFAULT 'neutral',
             language TEXT DEFAULT 'en',
             last_sent_date TEXT,
+            location_query TEXT,
             updated_at TEXT NOT NULL,
             FOREIGN KEY (email) REFERENCES users(email) ON DELETE CASCADE
         )
@@ -87,6 +89,7 @@ def test_db():
     yield path
     
     # Cleanup
+    close_pools()
     if original_db:
         os.environ['APP_DB_PATH'] = original_db
     else:
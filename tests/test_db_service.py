@@ -0,0 +1,82 @@
+"""
+Tests for the pooled SQLite connections in services/db_service.py.
+"""
+import pytest
+import sqlite3
+from services.db_service import get_connection, close_pools, checkpoint_wal
+
+
+@pytest.mark.unit
+def test_closed_connection_is_reused(test_db):
+    conn = get_connection(test_db)
+    conn.close()
+    assert get_connection(test_db) is conn
+
+
+@pytest.mark.unit
+def test_release_rolls_back_and_resets_row_factory(test_db):
+    conn = get_connection(test_db)
+    conn.row_factory = sqlite3.Row
+    conn.execute("INSERT INTO users (email, created_at, updated_at) VALUES ('pool@example.com', 'now', 'now')")
+    conn.close()
+    
+    conn = get_connection(test_db)
+    assert conn.row_factory is None
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE email = 'pool@example.com'").fetchone()[0] == 0
+    conn.close()
+
+
+@pytest.mark.unit
+def test_close_pools_closes_idle_connections(test_db):
+    conn = get_connection(test_db)
+    conn.close()
+    close_pools()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert get_connection(test_db) is not conn
+
+
+@pytest.mark.unit
+def test_wal_mode_and_connection_pragmas(test_db):
+    conn = get_connection(test_db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+    conn.close()
+
+
+@pytest.mark.unit
+def test_readonly_pool_rejects_writes(test_db):
+    conn = get_connection(test_db, readonly=True)
+    assert conn is not get_connection(test_db)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] >= 0
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO users (email, created_at, updated_at) VALUES ('ro@example.com', 'now', 'now')")
+    conn.close()
+    assert get_connection(test_db, readonly=True) is conn
+
+
+@pytest.mark.unit
+def test_writer_transactions_begin_immediate(test_db):
+    writer = get_connection(test_db)
+    assert writer.isolation_level == "IMMEDIATE"
+    writer.execute("INSERT INTO users (email, created_at, updated_at) VALUES ('lock@example.com', 'now', 'now')")
+    # The write lock is already held, so a second writer can't start its own transaction
+    other = sqlite3.connect(test_db, timeout=0)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("BEGIN IMMEDIATE")
+    finally:
+        other.close()
+        writer.close()
+
+
+@pytest.mark.unit
+def test_checkpoint_wal_truncates_log(test_db):
+    conn = get_connection(test_db)
+    conn.execute("INSERT INTO users (email, created_at, updated_at) VALUES ('wal@example.com', 'now', 'now')")
+    conn.commit()
+    conn.close()
+    busy, wal_pages, checkpointed = checkpoint_wal(test_db)
+    assert busy == 0
+    assert wal_pages == checkpointed == 0  # TRUNCATE leaves an empty log
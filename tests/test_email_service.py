@@ -1,5 +1,11 @@
 import pytest
-from services.email_service import start_email_monitor, stop_email_monitor, send_test_email, send_email, send_daily_email
+import smtplib
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from unittest.mock import patch
+from services.email_service import start_email_monitor, stop_email_monitor, send_test_email, send_email, send_daily_email, SMTPBatch, fetch_forecasts, forecast_key, run_daily_job
 
 class DummyConfig:
     email_address = "test@example.com"
@@ -30,3 +36,136 @@ def test_send_daily_email():
         'countdown_enabled': False
     }
     send_daily_email(config, user)
+
+def test_smtp_batch_reuses_and_reconnects():
+    config = DummyConfig()
+    with patch('services.email_service.smtplib.SMTP') as smtp_cls:
+        batch = SMTPBatch(config)
+        assert batch.send("a@example.com", "Subject", "Body")
+        assert batch.send("b@example.com", "Subject", "Body")
+        assert smtp_cls.call_count == 1
+        
+        smtp_cls.return_value.send_message.side_effect = [smtplib.SMTPServerDisconnected(), None]
+        assert batch.send("c@example.com", "Subject", "Body")
+        assert smtp_cls.call_count == 2
+        batch.close()
+
+def test_fetch_forecasts_maps_each_location():
+    def fake_forecast(lat, lon, tz):
+        if lat is None:
+            raise ValueError("no coordinates")
+        return {'temp_max': lat}
+    
+    locations = {(48.1, 17.1, 'Europe/Bratislava'), (50.1, 14.4, 'Europe/Prague'), (None, None, 'UTC')}
+    with patch('services.email_service.get_weather_forecast', side_effect=fake_forecast):
+        forecasts = fetch_forecasts(locations)
+    assert forecasts[(48.1, 17.1, 'Europe/Bratislava')] == {'temp_max': 48.1}
+    assert forecasts[(50.1, 14.4, 'Europe/Prague')] == {'temp_max': 50.1}
+    assert forecasts[(None, None, 'UTC')] is None
+    assert fetch_forecasts(set()) == {}
+
+def test_forecast_key_buckets_nearby_coordinates():
+    assert forecast_key(48.14816, 17.10674, 'Europe/Bratislava') == forecast_key(48.1468, 17.1081, 'Europe/Bratislava')
+    assert forecast_key(48.14816, 17.10674, 'Europe/Bratislava') != forecast_key(48.72, 21.26, 'Europe/Bratislava')
+
+def _zone_at_5am():
+    """Fixed-offset zone whose local hour is currently 5."""
+    offset = (5 - datetime.now(timezone.utc).hour) % 24
+    if offset > 14:
+        offset -= 24
+    return f"Etc/GMT{-offset:+d}" if offset else "UTC"
+
+def test_daily_job_sends_once_per_local_day(test_db):
+    tz = _zone_at_5am()
+    now = datetime.now(timezone.utc).isoformat()
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO users (email, timezone, weather_enabled, created_at, updated_at) VALUES (?, ?, 1, ?, ?)",
+                 ("early@example.com", tz, now, now))
+    conn.execute("INSERT INTO weather_subscriptions (email, location, lat, lon, updated_at) VALUES (?, 'Bratislava', 48.15, 17.11, ?)",
+                 ("early@example.com", now))
+    conn.commit()
+    conn.close()
+    
+    with patch('services.email_service.fetch_forecasts', side_effect=lambda keys: {key: {'temp_max': 20} for key in keys}), \
+         patch('services.email_service.generate_weather_summary', return_value="Sunny"), \
+         patch('services.email_service.send_daily_email', return_value=True) as send:
+        run_daily_job(DummyConfig(), db_path=test_db, timezone_name="Pacific/Kiritimati")
+        assert send.call_count == 0  # other timezone's job doesn't touch this user
+        run_daily_job(DummyConfig(), db_path=test_db, timezone_name=tz)
+        run_daily_job(DummyConfig(), db_path=test_db)
+    
+    assert send.call_count == 1
+    conn = sqlite3.connect(test_db)
+    last_sent = conn.execute("SELECT last_sent_date FROM users WHERE email = 'early@example.com'").fetchone()[0]
+    conn.close()
+    assert last_sent == datetime.now(ZoneInfo(tz)).date().isoformat()
+
+def test_daily_job_sends_countdown_only_user_once(test_db):
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from app import run_daily_safety_net
+    tz = _zone_at_5am()
+    now = datetime.now(timezone.utc).isoformat()
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO users (email, timezone, countdown_enabled, created_at, updated_at) VALUES (?, ?, 1, ?, ?)",
+                 ("countdown@example.com", tz, now, now))
+    conn.execute("INSERT INTO countdowns (email, name, date, created_at) VALUES (?, 'Trip', '2099-01-01', ?)",
+                 ("countdown@example.com", now))
+    conn.commit()
+    conn.close()
+    
+    with patch('services.email_service.generate_countdown_summary', return_value="Trip soon"), \
+         patch('services.email_service.send_daily_email', return_value=True) as send:
+        # The 05:00 per-timezone job, then the :30 safety net in the same hour
+        run_daily_job(DummyConfig(), db_path=test_db, timezone_name=tz)
+        run_daily_safety_net(BackgroundScheduler(), DummyConfig(), test_db)
+    
+    assert send.call_count == 1
+
+def test_mark_sent_warns_when_rows_are_missing(test_db):
+    from services.email_service import mark_sent
+    now = datetime.now(timezone.utc).isoformat()
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO users (email, created_at, updated_at) VALUES ('known@example.com', ?, ?)", (now, now))
+    conn.commit()
+    conn.close()
+    
+    marks = [('2026-01-01', 'known@example.com'), ('2026-01-01', 'gone@example.com')]
+    with patch('services.email_service.logger') as log:
+        mark_sent(marks, test_db)
+    assert marks == []
+    log.warning.assert_called_once()
+    
+    conn = sqlite3.connect(test_db)
+    assert conn.execute("SELECT last_sent_date FROM users WHERE email = 'known@example.com'").fetchone()[0] == '2026-01-01'
+    conn.close()
+
+def test_safety_net_waits_for_running_timezone_job(test_db):
+    tz = _zone_at_5am()
+    now = datetime.now(timezone.utc).isoformat()
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO users (email, timezone, countdown_enabled, created_at, updated_at) VALUES (?, ?, 1, ?, ?)",
+                 ("overlap@example.com", tz, now, now))
+    conn.commit()
+    conn.close()
+    
+    sending = threading.Event()
+    release = threading.Event()
+    def slow_send(config, user, smtp=None):
+        sending.set()
+        release.wait(5)
+        return True
+    
+    with patch('services.email_service.generate_countdown_summary', return_value="Trip soon"), \
+         patch('services.email_service.send_daily_email', side_effect=slow_send) as send:
+        timezone_job = threading.Thread(target=run_daily_job, args=(DummyConfig(),), kwargs={'db_path': test_db, 'timezone_name': tz})
+        timezone_job.start()
+        assert sending.wait(5)
+        # The safety net starts while the 05:00 job is mid-send and has not stamped the user yet
+        safety_net = threading.Thread(target=run_daily_job, args=(DummyConfig(),), kwargs={'db_path': test_db})
+        safety_net.start()
+        safety_net.join(0.2)
+        release.set()
+        timezone_job.join(5)
+        safety_net.join(5)
+    
+    assert send.call_count == 1
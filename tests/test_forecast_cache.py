@@ -0,0 +1,53 @@
+"""
+Test that forecasts are cached in memory per location for FORECAST_CACHE_TTL.
+"""
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import services.weather_service as weather_service
+
+FORECAST = {'temp_max': 20, 'temp_min': 10, 'precipitation_sum': 0, 'wind_speed_max': 5}
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache():
+    weather_service._forecast_memory.clear()
+    yield
+    weather_service._forecast_memory.clear()
+
+
+@pytest.mark.unit
+def test_forecast_fetched_once_per_location():
+    with patch.object(weather_service, '_fetch_weather_forecast', return_value=FORECAST) as fetch:
+        assert weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava') == FORECAST
+        assert weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava') == FORECAST
+        weather_service.get_weather_forecast(49.2, 16.61, 'Europe/Prague')
+    assert fetch.call_count == 2
+
+
+@pytest.mark.unit
+def test_expired_or_failed_forecast_refetched():
+    with patch.object(weather_service, '_fetch_weather_forecast', return_value=None) as fetch:
+        assert weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava') is None
+        assert weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava') is None
+    assert fetch.call_count == 2
+    
+    with patch.object(weather_service, '_fetch_weather_forecast', return_value=FORECAST) as fetch:
+        weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava')
+        for key, (expires_at, forecast) in weather_service._forecast_memory.items():
+            weather_service._forecast_memory[key] = (datetime(2000, 1, 1, tzinfo=timezone.utc), forecast)
+        weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava')
+    assert fetch.call_count == 2
+
+
+@pytest.mark.unit
+def test_oldest_forecast_evicted_when_full():
+    with patch.object(weather_service, 'FORECAST_MEMORY_SIZE', 2), \
+         patch.object(weather_service, '_fetch_weather_forecast', return_value=FORECAST):
+        weather_service.get_weather_forecast(48.15, 17.11, 'Europe/Bratislava')
+        weather_service.get_weather_forecast(49.2, 16.61, 'Europe/Prague')
+        weather_service.get_weather_forecast(48.21, 16.37, 'Europe/Vienna')
+    assert [key[:3] for key in weather_service._forecast_memory] == [
+        (49.2, 16.61, 'Europe/Prague'),
+        (48.21, 16.37, 'Europe/Vienna'),
+    ]
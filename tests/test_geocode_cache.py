@@ -0,0 +1,72 @@
+"""
+Test that geocoding results are cached in memory and in the geocode_cache table.
+"""
+import sqlite3
+import threading
+import pytest
+from unittest.mock import patch
+import services.weather_service as weather_service
+
+BRATISLAVA = (48.1486, 17.1077, 'Bratislava, Bratislava Region, Slovakia', 'Europe/Bratislava')
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache():
+    weather_service._geocode_memory.clear()
+    yield
+    weather_service._geocode_memory.clear()
+
+
+@pytest.mark.unit
+def test_geocode_cached_by_normalized_location(test_db):
+    with patch.object(weather_service, '_geocode_uncached', return_value=BRATISLAVA) as lookup:
+        assert weather_service.geocode_location('Bratislava') == BRATISLAVA
+        assert weather_service.geocode_location('  bratislava ') == BRATISLAVA
+    assert lookup.call_count == 1
+
+
+@pytest.mark.unit
+def test_geocode_cache_survives_process_memory(test_db):
+    with patch.object(weather_service, '_geocode_uncached', return_value=BRATISLAVA):
+        weather_service.geocode_location('Bratislava')
+    weather_service._geocode_memory.clear()
+    
+    with patch.object(weather_service, '_geocode_uncached') as lookup:
+        assert weather_service.geocode_location('Bratislava') == BRATISLAVA
+    lookup.assert_not_called()
+    
+    conn = sqlite3.connect(test_db)
+    assert conn.execute("SELECT COUNT(*) FROM geocode_cache WHERE key = 'bratislava'").fetchone()[0] == 1
+    conn.close()
+
+
+@pytest.mark.unit
+def test_failed_geocode_not_cached(test_db):
+    with patch.object(weather_service, '_geocode_uncached', return_value=None) as lookup:
+        assert weather_service.geocode_location('Nowhere') is None
+        assert weather_service.geocode_location('Nowhere') is None
+    assert lookup.call_count == 2
+
+
+@pytest.mark.unit
+def test_geocode_memory_shared_across_threads(test_db):
+    locations = [f'Town {n}' for n in range(40)]
+    errors = []
+    
+    def lookup_all():
+        try:
+            for location in locations:
+                weather_service.geocode_location(location)
+        except Exception as e:
+            errors.append(e)
+    
+    with patch.object(weather_service, 'GEOCODE_MEMORY_SIZE', 8), \
+         patch.object(weather_service, '_geocode_uncached', return_value=BRATISLAVA):
+        threads = [threading.Thread(target=lookup_all) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    assert errors == []
+    assert len(weather_service._geocode_memory) <= 8
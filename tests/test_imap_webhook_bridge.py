@@ -0,0 +1,179 @@
+"""
+Tests for the IMAP bridge's IDLE wait, against a fake IMAP connection over a socket pair.
+"""
+import socket
+import threading
+import pytest
+from email.message import EmailMessage
+from email.parser import BytesParser
+from unittest.mock import patch
+from webhook.imap_webhook_bridge import IMAPWebhookBridge
+
+
+class FakeIMAP:
+    """The slice of imaplib.IMAP4 the bridge uses, talking to a socket the test controls."""
+
+    def __init__(self, sock, capabilities=('IMAP4REV1', 'IDLE')):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+        self.capabilities = capabilities
+        self.tagged_commands = {}
+        self.tagnum = 0
+
+    def _new_tag(self):
+        self.tagnum += 1
+        tag = b'A%d' % self.tagnum
+        self.tagged_commands[tag] = None
+        return tag
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def readline(self):
+        return self.file.readline()
+
+
+@pytest.fixture
+def connection():
+    client, server = socket.socketpair()
+    yield FakeIMAP(client), server
+    client.close()
+    server.close()
+
+
+@pytest.fixture
+def bridge(monkeypatch):
+    monkeypatch.setenv('EMAIL_ADDRESS', 'bridge@example.com')
+    monkeypatch.setenv('EMAIL_PASSWORD', 'secret')
+    return IMAPWebhookBridge()
+
+
+def received(server):
+    server.settimeout(1)
+    return server.recv(4096)
+
+
+def answer_done(server, reply):
+    """Reply to DONE from a background thread, as a server does once IDLE is left."""
+    def serve():
+        data = b''
+        while not data.endswith(b'DONE\r\n'):
+            data += server.recv(4096)
+        server.sendall(reply)
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.mark.unit
+def test_idle_counts_untagged_exists_before_continuation(connection):
+    mail, server = connection
+    server.sendall(b'* 5 EXISTS\r\n+ idling\r\nA1 OK IDLE terminated\r\n')
+
+    assert IMAPWebhookBridge.idle_until_new_mail(mail, b'A1', timeout=5) is True
+    assert received(server) == b'A1 IDLE\r\nDONE\r\n'
+
+
+@pytest.mark.unit
+def test_idle_times_out_without_new_mail(connection):
+    mail, server = connection
+    server.sendall(b'+ idling\r\n* 1 FETCH (FLAGS (\\Seen))\r\n')
+    thread = answer_done(server, b'A1 OK IDLE terminated\r\n')
+
+    assert IMAPWebhookBridge.idle_until_new_mail(mail, b'A1', timeout=0.2) is False
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+@pytest.mark.unit
+def test_idle_ended_by_server(connection):
+    mail, server = connection
+    server.sendall(b'+ idling\r\nA1 OK IDLE terminated\r\n')
+
+    assert IMAPWebhookBridge.idle_until_new_mail(mail, b'A1', timeout=5) is False
+    assert received(server) == b'A1 IDLE\r\n'
+
+
+@pytest.mark.unit
+def test_rejected_idle_falls_back_to_polling(bridge, connection):
+    mail, server = connection
+    server.sendall(b'A1 BAD unknown command\r\n')
+
+    with patch('webhook.imap_webhook_bridge.time.sleep') as sleep:
+        bridge.wait_for_new_mail(mail)
+        bridge.wait_for_new_mail(mail)
+    assert sleep.call_count == 2
+    assert bridge.use_idle is False
+    assert mail.tagged_commands == {}
+    assert received(server) == b'A1 IDLE\r\n'
+
+
+@pytest.mark.unit
+def test_polls_when_imaplib_internals_are_missing(bridge):
+    class NoInternalsIMAP:
+        capabilities = ('IMAP4REV1', 'IDLE')
+
+    with patch('webhook.imap_webhook_bridge.time.sleep') as sleep:
+        bridge.wait_for_new_mail(NoInternalsIMAP())
+    sleep.assert_called_once_with(bridge.check_interval)
+
+
+@pytest.mark.unit
+def test_email_body_keeps_command_lines(bridge):
+    text = "weather Bratislava\n--\nTo: friend\nthank you\n" + "\n".join(f"line {n}" for n in range(12))
+    message = EmailMessage()
+    message.set_content(text)
+    
+    assert bridge.get_email_body(message) == text.strip()
+
+
+@pytest.mark.unit
+def test_email_body_joins_every_plain_part(bridge):
+    message = EmailMessage()
+    message.set_content("first part\n")
+    message.add_attachment("second part\n", filename="notes.txt")
+    message.add_attachment(b'%PDF', maintype='application', subtype='pdf', filename='a.pdf')
+    
+    assert bridge.get_email_body(message) == "first part\nsecond part"
+
+
+class FetchIMAP:
+    """Answers FETCH from whole raw messages, the way a server slices them into sections."""
+
+    def __init__(self, raw_messages):
+        self.raw_messages = raw_messages
+        self.fetched = []
+
+    def fetch(self, msg_set, items):
+        self.fetched.append(items)
+        response = []
+        for msg_id in msg_set.split(b','):
+            message = BytesParser().parsebytes(self.raw_messages[msg_id])
+            header, _, body = self.raw_messages[msg_id].partition(b'\n\n')
+            first = message.get_payload(0) if message.is_multipart() else None
+            if items == '(BODY[HEADER] BODY[1])':
+                part1 = first.as_bytes().partition(b'\n\n')[2] if first else body
+                response += [(msg_id + b' (BODY[HEADER] {1}', header + b'\n\n'), (b' BODY[1] {1}', part1), b')']
+            elif items == '(BODY.PEEK[1.MIME])':
+                response += [(msg_id + b' (BODY[1.MIME] {1}', first.as_bytes().partition(b'\n\n')[0] + b'\n\n'), b')']
+            elif items == '(BODY.PEEK[])':
+                response += [(msg_id + b' (BODY[] {1}', self.raw_messages[msg_id]), b')']
+        return 'OK', response
+
+
+@pytest.mark.unit
+def test_fetch_reads_plain_text_behind_html_first_part(bridge):
+    html_first = EmailMessage()
+    html_first['Subject'] = 'weather'
+    html_first.set_content('<p>weather Bratislava</p>', subtype='html')
+    html_first.add_attachment('weather Bratislava\n', filename='command.txt')
+    plain_first = EmailMessage()
+    plain_first.set_content('weather Prague\n')
+    plain_first.add_attachment(b'%PDF', maintype='application', subtype='pdf', filename='a.pdf')
+    mail = FetchIMAP({b'1': html_first.as_bytes(), b'2': plain_first.as_bytes()})
+
+    messages = bridge.fetch_text_messages(mail, [b'1', b'2'])
+
+    assert bridge.get_email_body(messages[b'1']) == 'weather Bratislava'
+    assert bridge.get_email_body(messages[b'2']) == 'weather Prague'
+    assert mail.fetched == ['(BODY[HEADER] BODY[1])', '(BODY.PEEK[1.MIME])', '(BODY.PEEK[])']
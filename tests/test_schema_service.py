@@ -0,0 +1,55 @@
+"""
+Tests for the versioned schema migrations in services/schema_service.py.
+"""
+import pytest
+import sqlite3
+from services.schema_service import migrate, get_schema_version, MIGRATIONS, SCHEMA_VERSION, _table_columns
+
+
+@pytest.mark.unit
+def test_init_db_leaves_schema_at_latest_version(test_db):
+    conn = sqlite3.connect(test_db)
+    try:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        assert migrate(conn) == 0
+        assert {'lat', 'lon'} <= _table_columns(conn, 'weather_subscriptions')
+    finally:
+        conn.close()
+
+
+@pytest.mark.unit
+def test_migrate_upgrades_unversioned_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    try:
+        conn.execute("""
+            CREATE TABLE users (
+                email TEXT PRIMARY KEY, lat REAL, lon REAL,
+                weather_enabled INTEGER DEFAULT 0, countdown_enabled INTEGER DEFAULT 0, reminder_enabled INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE weather_subscriptions (email TEXT PRIMARY KEY, location TEXT NOT NULL, updated_at TEXT NOT NULL)")
+
+        assert migrate(conn) == SCHEMA_VERSION
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        assert {'nickname', 'email_consent', 'terms_accepted', 'last_sent_date'} <= _table_columns(conn, 'users')
+        assert {'lat', 'lon'} <= _table_columns(conn, 'weather_subscriptions')
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_users_weather' in indexes
+    finally:
+        conn.close()
+
+
+@pytest.mark.unit
+def test_migrate_adds_last_sent_index_to_version_3_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "v3.db")
+    try:
+        for step in MIGRATIONS[:3]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 3")
+
+        assert migrate(conn) == SCHEMA_VERSION - 3
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_ws_last_sent' in indexes
+    finally:
+        conn.close()
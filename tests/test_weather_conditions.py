@@ -0,0 +1,82 @@
+"""
+Test weather condition detection against the original if/elif chain.
+"""
+import itertools
+import pytest
+from services.weather_service import detect_clothing_condition, detect_weather_condition
+
+
+def reference_condition(temp_max, temp_min, precipitation, wind_speed, rain_prob):
+    """Original branch logic, kept as an oracle for the decision table."""
+    if temp_max >= 30 and rain_prob < 20:
+        return 'sunny_hot'
+    if temp_max <= 5 and wind_speed >= 15:
+        return 'cold_windy'
+    if temp_max <= 5 and precipitation >= 2:
+        return 'rainy_cold'
+    if temp_max >= 36:
+        return 'heatwave'
+    if temp_min <= -15:
+        return 'blizzard'
+    if precipitation >= 10 and rain_prob >= 70:
+        return 'thunderstorm'
+    if precipitation >= 7:
+        return 'heavy_rain'
+    if precipitation >= 2:
+        return 'raining'
+    if temp_max <= 2 and precipitation > 0.5:
+        return 'snowing'
+    if temp_min < 0 and precipitation <= 0.1:
+        return 'freezing'
+    if temp_max >= 30:
+        return 'hot'
+    if temp_max <= 5:
+        return 'cold'
+    if wind_speed >= 15:
+        return 'windy'
+    if temp_min >= -2 and temp_max <= 8 and precipitation < 0.2 and wind_speed < 8 and rain_prob >= 60:
+        return 'foggy'
+    if rain_prob >= 70 and precipitation < 0.2:
+        return 'humid'
+    if precipitation < 0.05 and temp_max >= 25:
+        return 'dry'
+    if temp_max >= 20 and rain_prob < 20 and precipitation < 0.1:
+        return 'sunny'
+    if temp_max >= 10 and rain_prob < 40 and precipitation < 0.2:
+        return 'mild'
+    if rain_prob >= 30 or precipitation > 0.05:
+        return 'cloudy'
+    return 'default'
+
+
+# Sample every threshold plus values just around it
+TEMP_MAX_VALUES = [-20, 1.9, 2, 2.1, 5, 5.1, 8, 8.1, 9.9, 10, 19.9, 20, 25, 29.9, 30, 35.9, 36, 40]
+TEMP_MIN_VALUES = [-20, -15, -14.9, -2.1, -2, -0.1, 0, 10]
+PRECIPITATION_VALUES = [0, 0.05, 0.1, 0.15, 0.2, 0.5, 0.6, 2, 6.9, 7, 10, 15]
+WIND_SPEED_VALUES = [0, 7.9, 8, 14.9, 15, 30]
+RAIN_PROB_VALUES = [0, 19, 20, 29, 30, 39, 40, 59, 60, 69, 70, 100]
+
+
+@pytest.mark.unit
+def test_detect_weather_condition_matches_reference():
+    """Decision table must agree with the original chain over the sampled grid."""
+    for values in itertools.product(TEMP_MAX_VALUES, TEMP_MIN_VALUES, PRECIPITATION_VALUES,
+                                    WIND_SPEED_VALUES, RAIN_PROB_VALUES):
+        assert detect_weather_condition(*values) == reference_condition(*values), values
+
+
+@pytest.mark.unit
+def test_detect_weather_condition_examples():
+    assert detect_weather_condition(38, 25, 0, 5, 0) == 'sunny_hot'
+    assert detect_weather_condition(22, 12, 8, 5, 100) == 'heavy_rain'
+    assert detect_weather_condition(15, 8, 0, 5, 0) == 'mild'
+
+
+@pytest.mark.unit
+def test_detect_clothing_condition_priorities():
+    assert detect_clothing_condition(10, -16, 0, 5, 0) == 'blizzard'
+    assert detect_clothing_condition(38, 25, 0, 5, 0) == 'heatwave'
+    assert detect_clothing_condition(1, -3, 1, 5, 66) == 'snowing'
+    assert detect_clothing_condition(4, 0, 0, 20, 0) == 'cold_windy'
+    assert detect_clothing_condition(31, 20, 0, 5, 0) == 'sunny_hot'
+    assert detect_clothing_condition(15, 8, 0, 5, 0) == 'mild'
@@ -64,6 +64,16 @@ except Exception as e:
     api_client = None
 
 
+# Location input patterns, compiled once; the suspicious-pattern alternation scans
+# the input a single time instead of once per keyword
+SUSPICIOUS_LOCATION_PATTERNS = [
+    'select ', 'insert ', 'update ', 'delete ', 'drop ',
+    'union ', '--', '/*', '*/', 'xp_', 'exec ', 'script'
+]
+SUSPICIOUS_LOCATION_RE = re.compile('|'.join(map(re.escape, SUSPICIOUS_LOCATION_PATTERNS)), re.IGNORECASE)
+ALLOWED_LOCATION_RE = re.compile(r'^[a-zA-Z0-9\s,.\-áéíóúñüÁÉÍÓÚÑÜčďěňřšťůýžČĎĚŇŘŠŤŮÝŽ]+$')
+
+
 # Custom validators
 def validate_location_format(form, field):
     """Validate location input for security."""
@@ -76,17 +86,11 @@ def validate_location_format(form, field):
         raise ValidationError('Location is too long (max 100 characters)')
     
     # Block suspicious patterns (SQL injection attempts)
-    suspicious_patterns = [
-        'select ', 'insert ', 'update ', 'delete ', 'drop ',
-        'union ', '--', '/*', '*/', 'xp_', 'exec ', 'script'
-    ]
-    location_lower = location.lower()
-    for pattern in suspicious_patterns:
-        if pattern in location_lower:
-            raise ValidationError('Invalid location format')
+    if SUSPICIOUS_LOCATION_RE.search(location):
+        raise ValidationError('Invalid location format')
     
     # Allow only letters, numbers, spaces, commas, dashes, dots
-    if not re.match(r'^[a-zA-Z0-9\s,.\-áéíóúñüÁÉÍÓÚÑÜčďěňřšťůýžČĎĚŇŘŠŤŮÝŽ]+$', location):
+    if not ALLOWED_LOCATION_RE.match(location):
         raise ValidationError('Location contains invalid characters')
 
 
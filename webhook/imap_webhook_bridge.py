@@ -9,17 +9,19 @@ with any email provider.
 """
 
 import imaplib
+import re
 import smtplib
 import ssl
 import email
 import logging
 import json
 import time
-import hashlib
 import requests
 from datetime import datetime
+from email.message import Message
+from email.parser import BytesHeaderParser, BytesParser
 from email.utils import parseaddr
-from typing import Optional, Dict, Set
+from typing import Optional, Dict, Iterator, Tuple
 import os
 
 # Load environment variables
@@ -36,6 +38,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Section name in a FETCH response item, e.g. b'1 (BODY[HEADER] {342}' -> b'HEADER'
+FETCH_SECTION_RE = re.compile(rb'BODY\[([^\]]*)\]')
+# Message number opening a FETCH response, e.g. b'12 (BODY[HEADER] {342}' -> b'12'
+FETCH_MSG_NUM_RE = re.compile(rb'^(\d+) \(')
+
 class IMAPWebhookBridge:
     """Bridges IMAP email checking to webhook calls"""
     
@@ -49,13 +56,19 @@ class IMAPWebhookBridge:
         # Webhook configuration
         self.webhook_url = os.getenv('WEBHOOK_URL', 'http://localhost:5000/webhook/email')
         self.webhook_timeout = int(os.getenv('WEBHOOK_TIMEOUT', 10))
+        # Keep-alive connection to the webhook service across emails and checks
+        self.http_session = requests.Session()
         
         # Bridge configuration
         self.check_interval = int(os.getenv('BRIDGE_CHECK_INTERVAL', 30))  # seconds
+        # Servers drop IDLE after ~30 min of silence (RFC 2177); re-issue it before that
+        self.idle_timeout = int(os.getenv('BRIDGE_IDLE_TIMEOUT', 25 * 60))  # seconds
+        self.use_idle = True  # cleared if the server rejects IDLE
         self.max_emails_per_check = int(os.getenv('MAX_EMAILS_PER_CHECK', 50))
         
         # Track processed messages to avoid duplicates
-        self.processed_messages: Set[str] = set()
+        # Insertion-ordered, so the oldest entry is evicted first once the cache is full
+        self.processed_messages: Dict[str, None] = {}
         self.max_processed_cache = 10000
         
         if not all([self.email_address, self.email_password]):
@@ -85,6 +98,96 @@ class IMAPWebhookBridge:
             logger.error(f"IMAP connection failed: {e}")
             raise
     
+    @staticmethod
+    def _reserve_tag(mail: imaplib.IMAP4_SSL) -> Optional[bytes]:
+        """Take the next command tag for IDLE, which imaplib has no method for.
+        
+        This is the only place relying on imaplib internals (_new_tag, tagged_commands);
+        returns None if they are missing, and the caller falls back to polling. The tag is
+        unregistered at once because IDLE responses are read here, never by imaplib.
+        """
+        try:
+            tag = mail._new_tag()
+            mail.tagged_commands.pop(tag, None)
+        except AttributeError:
+            return None
+        return tag
+    
+    @staticmethod
+    def _is_new_mail(line: bytes) -> bool:
+        """True for an untagged EXISTS/RECENT response, e.g. b'* 5 EXISTS'"""
+        words = line.split()
+        return len(words) == 3 and words[0] == b'*' and words[2].upper() in (b'EXISTS', b'RECENT')
+    
+    @classmethod
+    def idle_until_new_mail(cls, mail: imaplib.IMAP4_SSL, tag: bytes, timeout: float) -> bool:
+        """Hold the connection in IMAP IDLE until the server pushes new mail or `timeout` passes.
+        
+        Returns True if an EXISTS/RECENT notification arrived. Raises IMAP4.error if the
+        server rejects IDLE and IMAP4.abort if the connection drops.
+        """
+        mail.send(tag + b' IDLE\r\n')
+        
+        # Untagged responses (e.g. new mail) may arrive before the continuation
+        new_mail = False
+        while True:
+            line = mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("connection closed starting IDLE")
+            if line.startswith(b'+'):
+                break
+            if line.startswith(tag + b' '):
+                raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+            new_mail = new_mail or cls._is_new_mail(line)
+        
+        deadline = time.monotonic() + timeout
+        previous_timeout = mail.sock.gettimeout()
+        try:
+            while not new_mail:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                mail.sock.settimeout(remaining)
+                try:
+                    line = mail.readline()
+                except TimeoutError:
+                    # A reader that timed out refuses further reads; start a fresh one
+                    mail.file = mail.sock.makefile('rb')
+                    break
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                if line.startswith(tag + b' '):
+                    return False  # server ended IDLE on its own; nothing to leave
+                new_mail = cls._is_new_mail(line)
+        finally:
+            mail.sock.settimeout(previous_timeout)
+        
+        # Leave IDLE and consume everything up to our tagged completion
+        mail.send(b'DONE\r\n')
+        while True:
+            line = mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("connection closed leaving IDLE")
+            if line.startswith(tag + b' '):
+                break
+        return new_mail
+    
+    def wait_for_new_mail(self, mail: imaplib.IMAP4_SSL) -> None:
+        """Block until the next check: server push via IDLE when supported, else the poll interval"""
+        tag = self._reserve_tag(mail) if self.use_idle and 'IDLE' in mail.capabilities else None
+        if tag is None:
+            time.sleep(self.check_interval)
+            return
+        try:
+            if self.idle_until_new_mail(mail, tag, self.idle_timeout):
+                logger.debug("IDLE: new mail notification")
+        except imaplib.IMAP4.abort:
+            raise  # connection problem: let run_bridge reconnect
+        except imaplib.IMAP4.error as e:
+            logger.warning(f"IDLE unavailable, falling back to polling: {e}")
+            self.use_idle = False
+            time.sleep(self.check_interval)
+    
     def get_email_body(self, email_message) -> str:
         """Extract email body text"""
         body = ""
@@ -107,7 +210,7 @@ class IMAPWebhookBridge:
         try:
             logger.info(f"Sending webhook for email: {email_data['subject']}")
             
-            response = requests.post(
+            response = self.http_session.post(
                 self.webhook_url,
                 json=email_data,
                 timeout=self.webhook_timeout,
@@ -132,48 +235,131 @@ class IMAPWebhookBridge:
             logger.error(f"Webhook error: {e}")
             return False
     
-    def process_new_emails(self, mail: imaplib.IMAP4_SSL) -> int:
-        """Check for and process new emails"""
-        try:
-            # Search for unseen emails
-            status, messages = mail.search(None, 'UNSEEN')
-            
-            if status != 'OK':
-                logger.error("Failed to search for emails")
-                return 0
-            
-            message_ids = messages[0].split()
+    @staticmethod
+    def _fetch_sections(mail: imaplib.IMAP4_SSL, msg_ids: list, items: str) -> Dict[bytes, Dict[bytes, bytes]]:
+        """FETCH body sections for several messages in one round trip.
+        
+        Returns {message number: {section name (e.g. b'HEADER'): bytes}}.
+        """
+        status, msg_data = mail.fetch(b','.join(msg_ids), items)
+        if status != 'OK':
+            return {}
+        
+        messages = {}
+        sections = None
+        for item in msg_data:
+            if not isinstance(item, tuple):
+                continue
+            # Later literals of the same message arrive without the leading message number
+            number = FETCH_MSG_NUM_RE.match(item[0])
+            if number:
+                sections = messages.setdefault(number.group(1), {})
+            match = FETCH_SECTION_RE.search(item[0])
+            if match and sections is not None:
+                sections[match.group(1).upper()] = item[1]
+        return messages
+    
+    def fetch_text_messages(self, mail: imaplib.IMAP4_SSL, msg_ids: list) -> Dict[bytes, Message]:
+        """Fetch headers and first MIME part of several emails without downloading attachments.
+        
+        Each message carries the original headers and only part 1 as payload, which is where
+        clients put the text/plain (or text/alternative) body. Costs one FETCH for the batch,
+        plus one for the part headers of any multipart messages, plus one full-message FETCH
+        for those whose part 1 holds no text/plain (e.g. an HTML part first).
+        """
+        # BODY[...] (not PEEK) marks the messages as seen, same as the former RFC822 fetch
+        fetched = self._fetch_sections(mail, msg_ids, '(BODY[HEADER] BODY[1])')
+        
+        messages = {}
+        multipart = {}
+        for msg_id, sections in fetched.items():
+            if b'HEADER' not in sections:
+                continue
+            headers = BytesHeaderParser().parsebytes(sections[b'HEADER'])
+            if headers.get_content_maintype() == 'multipart':
+                multipart[msg_id] = (headers, sections.get(b'1') or b'')
+            else:
+                # Single-part message: part 1 is the whole body, encoded per the top-level headers
+                messages[msg_id] = BytesParser().parsebytes(sections[b'HEADER'] + (sections.get(b'1') or b''))
+        
+        if multipart:
+            # Multipart: part 1 needs its own MIME headers (encoding, nested boundary)
+            mime_sections = self._fetch_sections(mail, list(multipart), '(BODY.PEEK[1.MIME])')
+            full_fetch = []
+            for msg_id, (headers, first_part) in multipart.items():
+                part = BytesParser().parsebytes(mime_sections.get(msg_id, {}).get(b'1.MIME', b'') + first_part)
+                if not any(subpart.get_content_type() == 'text/plain' for subpart in part.walk()):
+                    full_fetch.append(msg_id)  # the plain-text body is in a later part
+                    continue
+                email_message = Message()
+                for name, value in headers.items():
+                    email_message[name] = value
+                email_message.set_payload([part])
+                messages[msg_id] = email_message
             
-            if not message_ids:
-                logger.debug("No new emails found")
-                return 0
+            if full_fetch:
+                # BODY.PEEK[] is the whole message, like RFC822, but named as a section for _fetch_sections
+                for msg_id, sections in self._fetch_sections(mail, full_fetch, '(BODY.PEEK[])').items():
+                    if b'' in sections:
+                        messages[msg_id] = BytesParser().parsebytes(sections[b''])
+        
+        return messages
+    
+    def fetch_unseen_emails(self, mail: imaplib.IMAP4_SSL) -> Iterator[Tuple[str, Message]]:
+        """Yield (message number, parsed email) for unseen emails, one at a time"""
+        # Search for unseen emails
+        status, messages = mail.search(None, 'UNSEEN')
+        
+        if status != 'OK':
+            logger.error("Failed to search for emails")
+            return
+        
+        message_ids = messages[0].split()
+        
+        if not message_ids:
+            logger.debug("No new emails found")
+            return
+        
+        # Limit number of emails processed per check
+        if len(message_ids) > self.max_emails_per_check:
+            logger.warning(f"Found {len(message_ids)} emails, limiting to {self.max_emails_per_check}")
+            message_ids = message_ids[:self.max_emails_per_check]
+        
+        # Skip if already processed
+        message_ids = [msg_id for msg_id in message_ids if msg_id.decode('utf-8') not in self.processed_messages]
+        if not message_ids:
+            return
+        
+        try:
+            # One FETCH for the whole batch: headers and first body part only, attachments never cross the wire
+            email_messages = self.fetch_text_messages(mail, message_ids)
+        except Exception as e:
+            logger.error(f"Error fetching emails: {e}")
+            return
+        
+        for msg_id in message_ids:
+            msg_id_str = msg_id.decode('utf-8')
+            email_message = email_messages.get(msg_id)
             
-            # Limit number of emails processed per check
-            if len(message_ids) > self.max_emails_per_check:
-                logger.warning(f"Found {len(message_ids)} emails, limiting to {self.max_emails_per_check}")
-                message_ids = message_ids[:self.max_emails_per_check]
+            if email_message is None:
+                logger.error(f"Failed to fetch email {msg_id_str}")
+                continue
             
+            yield msg_id_str, email_message
+    
+    def remember_processed(self, msg_id_str: str) -> None:
+        """Record a bridged message, dropping the oldest entry once max_processed_cache is reached"""
+        if msg_id_str not in self.processed_messages and len(self.processed_messages) >= self.max_processed_cache:
+            self.processed_messages.pop(next(iter(self.processed_messages)))
+        self.processed_messages[msg_id_str] = None
+    
+    def process_new_emails(self, mail: imaplib.IMAP4_SSL) -> int:
+        """Check for and process new emails"""
+        try:
             processed_count = 0
             
-            for msg_id in message_ids:
+            for msg_id_str, email_message in self.fetch_unseen_emails(mail):
                 try:
-                    msg_id_str = msg_id.decode('utf-8')
-                    
-                    # Skip if already processed
-                    if msg_id_str in self.processed_messages:
-                        continue
-                    
-                    # Fetch email
-                    status, msg_data = mail.fetch(msg_id, '(RFC822)')
-                    
-                    if status != 'OK':
-                        logger.error(f"Failed to fetch email {msg_id_str}")
-                        continue
-                    
-                    # Parse email
-                    email_body = msg_data[0][1]
-                    email_message = email.message_from_bytes(email_body)
-                    
                     # Extract email data
                     sender = email_message.get('From', '')
                     subject = email_message.get('Subject', '')
@@ -192,22 +378,16 @@ class IMAPWebhookBridge:
                     
                     # Send webhook
                     if self.send_webhook(webhook_data):
-                        self.processed_messages.add(msg_id_str)
+                        self.remember_processed(msg_id_str)
                         processed_count += 1
                         logger.info(f"Successfully bridged email from {sender}")
                     else:
                         logger.error(f"Failed to bridge email from {sender}")
                     
                 except Exception as e:
-                    logger.error(f"Error processing email {msg_id}: {e}")
+                    logger.error(f"Error processing email {msg_id_str}: {e}")
                     continue
             
-            # Clean up processed messages cache if it gets too large
-            if len(self.processed_messages) > self.max_processed_cache:
-                # Keep only the most recent half
-                self.processed_messages = set(list(self.processed_messages)[-self.max_processed_cache//2:])
-                logger.info(f"Cleaned processed messages cache, now has {len(self.processed_messages)} entries")
-            
             if processed_count > 0:
                 logger.info(f"Processed {processed_count} new emails")
             
@@ -238,8 +418,8 @@ class IMAPWebhookBridge:
                         processed = self.process_new_emails(mail)
                         consecutive_errors = 0  # Reset error count on success
                         
-                        # Wait before next check
-                        time.sleep(self.check_interval)
+                        # Wait for the server to push new mail (or the poll interval) on the same connection
+                        self.wait_for_new_mail(mail)
                         
                     except Exception as e:
                         consecutive_errors += 1
@@ -15,8 +15,6 @@ import hashlib
 import re
 import base64
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from email.utils import parseaddr
 from typing import Dict, List, Optional, NamedTuple
 from zoneinfo import ZoneInfo